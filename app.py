@@ -1,7 +1,10 @@
+import asyncio
 import sqlite3
+import click
 from io import BytesIO
-from flask import Flask, render_template, request, jsonify, redirect, Response, url_for
-import pandas as pd
+from functools import partial
+from datetime import date
+from flask import Flask, render_template, request, jsonify, redirect, Response, stream_with_context, url_for
 from utils import (
     initialize_database,
     get_exercises,
@@ -13,7 +16,22 @@ from utils import (
     calculate_isolated_muscles_stats,
 )
 from utils.session_summary import calculate_session_summary
-from utils.database import DatabaseHandler
+from utils.database import DatabaseHandler, init_app as init_database
+from utils.tenancy import current_tenant, init_app as init_tenancy, tenant_scope
+from utils.async_database import gather_reads, init_app as init_read_timings, run_db
+from utils.catalog import get_catalog
+from utils.data_export import EXPORT_DATASETS, EXPORT_FORMATS, check_export, stream_export
+from utils.excel_export import XLSX_MIME_TYPE, dict_rows, stream_file, write_workbook
+from utils.dashboard import WORKOUT_PLAN_QUERY, build_dashboard, parse_fields, parse_methods
+from utils.data_versions import etag_cached
+from utils.summary_engine import scaling_factors_key
+from utils.catalog_import import detect_format, import_catalog
+from utils.similarity import get_routine_exercises
+from utils.log_rollups import get_rollup_lag, get_rollups, refresh_rollups
+from utils.progression_engine import get_progression
+from utils.exercise_manager import search_exercises
+from utils.query_stats import dump_query_stats
+from utils.query_cache import dump_query_cache_stats
 from utils.volume_classifier import (
     get_volume_class, 
     get_volume_label, 
@@ -21,9 +39,22 @@ from utils.volume_classifier import (
     get_category_tooltip,
     get_subcategory_tooltip
 )
+from utils.config import STATS_ENDPOINTS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 app = Flask(__name__)
 
+# Share one pooled connection per request
+init_database(app)
+
+# Route each user to their own database shard (TENANT_MODE only)
+init_tenancy(app)
+
+# Report parallel read timings in a Server-Timing header
+init_read_timings(app)
+
 # Initialize the database
 initialize_database()
 
@@ -50,44 +81,66 @@ def index():
     """
     return render_template("welcome.html")
 
+def wants_json():
+    """True when the client asked for the JSON variant of a page."""
+    return request.headers.get("Accept") == "application/json"
+
 def fetch_unique_values(column):
-    """Fetch unique values for a specified column from the exercises table."""
-    query = f"SELECT DISTINCT {column} FROM exercises WHERE {column} IS NOT NULL ORDER BY {column} ASC"
+    """Fetch unique values for a specified column from the in-memory exercise catalog."""
     try:
-        with DatabaseHandler() as db:
-            results = db.fetch_all(query, None)
-            # Handle both dictionary and tuple results
-            if results and isinstance(results[0], dict):
-                return [row[column] for row in results if row[column]]
-            else:
-                return [row[0] for row in results if row[0]]
+        return get_catalog().distinct_values(column)
     except Exception as e:
-        print(f"Error fetching unique values for {column}: {e}")
+        logger.error("Error fetching unique values for %s: %s", column, e)
         return []
 
+def sanitize_filters(filters):
+    """Convert frontend filter names to database column names using our standard mapping."""
+    sanitized_filters = {}
+    for key, value in (filters or {}).items():
+        db_field = FILTER_MAPPING.get(key)
+        if db_field and value:
+            sanitized_filters[db_field] = value
+    return sanitized_filters
+
 @app.route("/filter_exercises", methods=["POST"])
 def filter_exercises():
     try:
         filters = request.get_json()
-        print(f"DEBUG: Received filters: {filters}")
-
-        # Convert frontend names to database column names using our standard mapping
-        sanitized_filters = {}
-        for key, value in filters.items():
-            db_field = FILTER_MAPPING.get(key)
-            if db_field and value:
-                sanitized_filters[db_field] = value
+        logger.debug("Received filters: %s", filters)
 
-        print(f"DEBUG: Sanitized filters: {sanitized_filters}")
+        sanitized_filters = sanitize_filters(filters)
+        logger.debug("Sanitized filters: %s", sanitized_filters)
         exercise_names = get_exercises(filters=sanitized_filters)
-        print(f"DEBUG: Found {len(exercise_names)} matching exercises")
+        logger.debug("Found %d matching exercises", len(exercise_names))
 
         return jsonify(exercise_names)
     except Exception as e:
-        print(f"Error in filter_exercises: {e}")
+        logger.error("Error in filter_exercises: %s", e)
         return jsonify({"error": str(e)}), 500
     
 
+@app.route("/filter_facets", methods=["POST"])
+def filter_facets():
+    """
+    For the current filter selections, every filter's values with the number of
+    exercises each would leave, plus the number matching the selections as-is.
+    """
+    try:
+        filters = sanitize_filters(request.get_json(silent=True))
+        catalog = get_catalog()
+        counts = catalog.facet_counts(filters)
+        return jsonify({
+            "total": catalog.filter_index.count(catalog.filter_index.select(filters)),
+            "facets": {
+                display_name: [{"value": value, "count": count} for value, count in counts[db_column]]
+                for display_name, db_column in FILTER_MAPPING.items()
+            },
+        })
+    except Exception as e:
+        logger.error("Error in filter_facets: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
 def get_routine_options():
     """Return the structured routine options with clear hierarchy."""
     return {
@@ -166,12 +219,17 @@ def get_routine_options():
     }
 
 @app.route("/workout_plan")
-def workout_plan():
+async def workout_plan():
     try:
-        exercises = get_exercises() or []
-        user_selection = get_user_selection() or []
+        # Independent reads run concurrently on the database executor
+        exercises, user_selection = await asyncio.gather(
+            run_db(get_exercises),
+            run_db(get_user_selection),
+        )
+        exercises = exercises or []
+        user_selection = user_selection or []
 
-        # Initialize filters using the standard mapping
+        # Initialize filters using the standard mapping (served from the catalog snapshot)
         filters = {
             display_name: fetch_unique_values(db_column) or []
             for display_name, db_column in FILTER_MAPPING.items()
@@ -186,32 +244,21 @@ def workout_plan():
             enumerate=enumerate
         )
     except Exception as e:
-        print(f"Error in workout_plan: {e}")
+        logger.error("Error in workout_plan: %s", e)
         return render_template("error.html", message="Unable to load workout plan."), 500
 
 
 @app.route("/get_workout_plan")
+@etag_cached("user_selection", "exercises")
 def get_workout_plan():
     """Fetch the current workout plan."""
     try:
-        query = """
-        SELECT 
-            us.id, us.routine, us.exercise, us.sets, 
-            us.min_rep_range, us.max_rep_range, us.rir, us.weight,
-            e.primary_muscle_group, e.secondary_muscle_group, 
-            e.tertiary_muscle_group, e.advanced_isolated_muscles,
-            e.utility, e.grips, e.stabilizers, e.synergists
-        FROM user_selection us
-        LEFT JOIN exercises e ON us.exercise = e.exercise_name
-        ORDER BY us.routine, us.exercise
-        """
-        
         with DatabaseHandler() as db:
-            results = db.fetch_all(query)
+            results = db.fetch_all(WORKOUT_PLAN_QUERY, cache=True)
             return jsonify(results)
             
     except Exception as e:
-        print(f"Error fetching workout plan: {e}")
+        logger.error("Error fetching workout plan: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -219,14 +266,14 @@ def get_workout_plan():
 def add_exercise():
     try:
         data = request.get_json()
-        print("DEBUG: Received data:", data)
+        logger.debug("Received data: %s", data)
         
         # Validate required fields
         required_fields = ["exercise", "routine", "sets", "min_rep_range", "max_rep_range", "weight"]
         missing_fields = [field for field in required_fields if field not in data or not data[field]]
         
         if missing_fields:
-            print(f"DEBUG: Missing fields: {missing_fields}")
+            logger.debug("Missing fields: %s", missing_fields)
             return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
 
         exercise = data["exercise"]
@@ -243,7 +290,7 @@ def add_exercise():
 
         try:
             with DatabaseHandler() as db:
-                db.execute_query(
+                new_id = db.execute_query(
                     """
                     INSERT INTO user_selection 
                     (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight)
@@ -252,8 +299,7 @@ def add_exercise():
                     (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight)
                 )
                 
-                new_id = db.cursor.lastrowid
-                print(f"DEBUG: Successfully added exercise with ID: {new_id}")
+                logger.debug("Successfully added exercise with ID: %s", new_id)
                 
                 # Fetch the complete exercise details
                 details_query = """
@@ -278,20 +324,20 @@ def add_exercise():
                 }), 200
 
         except sqlite3.Error as e:
-            print(f"DEBUG: Database error: {str(e)}")
+            logger.error("Database error: %s", e)
             if "UNIQUE constraint failed" in str(e):
                 return jsonify({"error": "This exact exercise configuration already exists"}), 400
             return jsonify({"error": "Failed to add exercise to database"}), 500
 
     except Exception as e:
-        print(f"DEBUG: Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         return jsonify({"error": f"Failed to add exercise: {str(e)}"}), 500
 
 @app.route("/remove_exercise", methods=["POST"])
 def remove_exercise():
     try:
         data = request.get_json()
-        print(f"DEBUG: Received data for remove_exercise: {data}")
+        logger.debug("Received data for remove_exercise: %s", data)
 
         exercise_id = data.get("id")
         if not exercise_id or not str(exercise_id).isdigit():
@@ -301,19 +347,23 @@ def remove_exercise():
         with DatabaseHandler() as db_handler:
             db_handler.execute_query(query, (int(exercise_id),))
 
-        print(f"DEBUG: Deleted exercise with ID = {exercise_id}")
+        logger.debug("Deleted exercise with ID = %s", exercise_id)
         return jsonify({"message": "Exercise removed successfully"}), 200
     except Exception as e:
-        print(f"Error in remove_exercise: {e}")
+        logger.error("Error in remove_exercise: %s", e)
         return jsonify({"error": "Unable to remove exercise"}), 500
 
 @app.route("/weekly_summary", methods=["GET"])
-def weekly_summary():
+@etag_cached("user_selection", "exercises", when=wants_json, key=scaling_factors_key)
+async def weekly_summary():
     method = request.args.get("method", "Total")
     try:
-        results = calculate_weekly_summary(method)
-        category_results = calculate_exercise_categories()
-        isolated_muscles_stats = calculate_isolated_muscles_stats()
+        reads = await gather_reads({
+            "summary": partial(calculate_weekly_summary, method),
+            "categories": calculate_exercise_categories,
+            "isolated_muscles": calculate_isolated_muscles_stats,
+        })
+        results, category_results, isolated_muscles_stats = reads.values()
         
         if request.headers.get("Accept") == "application/json":
             return jsonify({
@@ -335,18 +385,22 @@ def weekly_summary():
             get_subcategory_tooltip=get_subcategory_tooltip
         )
     except Exception as e:
-        print(f"Error in weekly_summary: {e}")
+        logger.error("Error in weekly_summary: %s", e)
         if request.headers.get("Accept") == "application/json":
             return jsonify({"error": "Unable to fetch weekly summary"}), 500
         return render_template("error.html", message="Unable to load weekly summary."), 500
 
 @app.route("/session_summary", methods=["GET"])
-def session_summary():
+@etag_cached("user_selection", "exercises", when=wants_json, key=scaling_factors_key)
+async def session_summary():
     method = request.args.get("method", "Total")
     try:
-        results = calculate_session_summary(method)
-        category_results = calculate_exercise_categories()
-        isolated_muscles_stats = calculate_isolated_muscles_stats()
+        reads = await gather_reads({
+            "summary": partial(calculate_session_summary, method),
+            "categories": calculate_exercise_categories,
+            "isolated_muscles": calculate_isolated_muscles_stats,
+        })
+        results, category_results, isolated_muscles_stats = reads.values()
         
         if request.headers.get("Accept") == "application/json":
             return jsonify({
@@ -367,78 +421,112 @@ def session_summary():
             get_subcategory_tooltip=get_subcategory_tooltip
         )
     except Exception as e:
-        print(f"Error in session_summary: {e}")
+        logger.error("Error in session_summary: %s", e)
         if request.headers.get("Accept") == "application/json":
             return jsonify({"error": "Unable to fetch session summary"}), 500
         return render_template("error.html", message="Unable to load session summary."), 500
 
+@app.route("/dashboard")
+@etag_cached("user_selection", "exercises", key=scaling_factors_key)
+def dashboard():
+    """
+    Plan, summaries, categories and isolated muscle stats in one response,
+    all read from one snapshot.
+    Query parameters: `method` (repeatable or comma-separated; "all" for
+    every method; default Total) and `fields` (section names to include;
+    default all sections).
+    """
+    try:
+        methods = parse_methods(request.args.getlist("method"))
+        fields = parse_fields(request.args.getlist("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return jsonify(build_dashboard(methods, fields))
+    except Exception as e:
+        logger.error("Error in dashboard: %s", e)
+        return jsonify({"error": "Unable to fetch dashboard"}), 500
+
+EXCEL_WORKOUT_PLAN_QUERY = """
+    SELECT 
+        us.routine, us.exercise, us.sets, 
+        us.min_rep_range, us.max_rep_range, us.rir, us.weight,
+        e.primary_muscle_group, e.secondary_muscle_group, 
+        e.tertiary_muscle_group, e.advanced_isolated_muscles,
+        e.utility, e.grips, e.stabilizers, e.synergists
+    FROM user_selection us
+    JOIN exercises e ON us.exercise = e.exercise_name
+    ORDER BY us.routine, us.exercise
+"""
+
+EXCEL_WORKOUT_LOG_QUERY = """
+    SELECT * FROM workout_log 
+    ORDER BY routine, exercise
+"""
+
+
 @app.route("/export_to_excel")
 def export_to_excel():
-    """Export all data to Excel."""
+    """
+    Export all data to Excel. Rows are written straight from the cursors
+    into a spooled temporary file, which is then streamed in chunks.
+    Every sheet is read through the request's connection, so the workbook
+    comes from one read snapshot.
+    """
     try:
-        # Create a BytesIO object to store the Excel file
-        output = BytesIO()
-        
-        # Create Excel writer
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            # Export Workout Plan
-            workout_plan_query = """
-            SELECT 
-                us.routine, us.exercise, us.sets, 
-                us.min_rep_range, us.max_rep_range, us.rir, us.weight,
-                e.primary_muscle_group, e.secondary_muscle_group, 
-                e.tertiary_muscle_group, e.advanced_isolated_muscles,
-                e.utility, e.grips, e.stabilizers, e.synergists
-            FROM user_selection us
-            JOIN exercises e ON us.exercise = e.exercise_name
-            ORDER BY us.routine, us.exercise
-            """
-            with DatabaseHandler() as db:
-                workout_plan = pd.DataFrame(db.fetch_all(workout_plan_query))
-            if not workout_plan.empty:
-                workout_plan.to_excel(writer, sheet_name='Workout Plan', index=False)
-
-            # Export Weekly Summary
-            weekly_summary = pd.DataFrame(calculate_weekly_summary())
-            if not weekly_summary.empty:
-                weekly_summary.to_excel(writer, sheet_name='Weekly Summary', index=False)
-
-            # Export Session Summary
-            session_summary = pd.DataFrame(calculate_session_summary())
-            if not session_summary.empty:
-                session_summary.to_excel(writer, sheet_name='Session Summary', index=False)
-
-            # Export Workout Log
-            workout_log_query = """
-            SELECT * FROM workout_log 
-            ORDER BY routine, exercise
-            """
-            with DatabaseHandler() as db:
-                workout_log = pd.DataFrame(db.fetch_all(workout_log_query))
-            if not workout_log.empty:
-                workout_log.to_excel(writer, sheet_name='Workout Log', index=False)
-
-            # Export Categories Summary
-            categories = pd.DataFrame(calculate_exercise_categories())
-            if not categories.empty:
-                categories.to_excel(writer, sheet_name='Categories', index=False)
-
-            # Export Isolated Muscles Stats
-            isolated_muscles = pd.DataFrame(calculate_isolated_muscles_stats())
-            if not isolated_muscles.empty:
-                isolated_muscles.to_excel(writer, sheet_name='Isolated Muscles', index=False)
-
-        # Set response headers
-        output.seek(0)
+        with DatabaseHandler(read_only=True) as db:
+            # The small summaries are loaded before the cursors are opened
+            weekly_summary = calculate_weekly_summary()
+            session_summary = calculate_session_summary()
+            categories = calculate_exercise_categories()
+            isolated_muscles = calculate_isolated_muscles_stats()
+            output, size = write_workbook({
+                "Workout Plan": db.fetch_batches(EXCEL_WORKOUT_PLAN_QUERY),
+                "Weekly Summary": dict_rows(weekly_summary),
+                "Session Summary": dict_rows(session_summary),
+                "Workout Log": db.fetch_batches(EXCEL_WORKOUT_LOG_QUERY),
+                "Categories": dict_rows(categories),
+                "Isolated Muscles": dict_rows(isolated_muscles),
+            })
+
         return Response(
-            output,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment;filename=workout_tracker_summary.xlsx"},
+            stream_file(output),
+            mimetype=XLSX_MIME_TYPE,
+            headers={
+                "Content-Disposition": "attachment;filename=workout_tracker_summary.xlsx",
+                "Content-Length": str(size),
+            },
         )
     except Exception as e:
-        print(f"Error exporting to Excel: {e}")
+        logger.error("Error exporting to Excel: %s", e)
         return jsonify({"error": "Failed to export to Excel"}), 500
 
+@app.route("/export")
+def export_index():
+    """List the datasets and formats served by /export/<dataset>.<format>."""
+    return jsonify({
+        "datasets": list(EXPORT_DATASETS),
+        "formats": list(EXPORT_FORMATS),
+        "url": "/export/<dataset>.<format>",
+    })
+
+@app.route("/export/<dataset>.<file_format>")
+def export_dataset(dataset, file_format):
+    """
+    Stream one dataset as CSV, newline-delimited JSON or Parquet. Bytes are
+    sent as they are produced, all from the request's read snapshot.
+    """
+    try:
+        check_export(dataset, file_format)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mimetype, extension = EXPORT_FORMATS[file_format]
+    return Response(
+        stream_with_context(stream_export(dataset, file_format)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment;filename={dataset}.{extension}"},
+    )
+
 @app.route("/workout_log")
 def workout_log():
     """Render the workout log page."""
@@ -451,7 +539,7 @@ def workout_log():
             enumerate=enumerate,
         )
     except Exception as e:
-        print(f"Error in workout_log: {e}")
+        logger.error("Error in workout_log: %s", e)
         return render_template("error.html", message="Unable to load workout log."), 500
 
 @app.route("/export_to_workout_log", methods=["POST"])
@@ -476,9 +564,9 @@ def export_to_workout_log():
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """
             
-            for exercise in workout_plan:
-                db.execute_query(
-                    insert_query,
+            db.execute_many(
+                insert_query,
+                [
                     (
                         exercise["id"],
                         exercise["routine"],
@@ -489,11 +577,13 @@ def export_to_workout_log():
                         exercise["rir"],
                         exercise["weight"]
                     )
-                )
+                    for exercise in workout_plan
+                ]
+            )
 
         return jsonify({"message": "Workout plan exported to log successfully"}), 200
     except Exception as e:
-        print(f"Error exporting to workout log: {e}")
+        logger.error("Error exporting to workout log: %s", e)
         return jsonify({"error": "Failed to export workout plan"}), 500
 
 @app.route("/update_workout_log", methods=["POST"])
@@ -527,7 +617,7 @@ def update_workout_log():
 
         return jsonify({"message": "Workout log updated successfully"}), 200
     except Exception as e:
-        print(f"Error updating workout log: {e}")
+        logger.error("Error updating workout log: %s", e)
         return jsonify({"error": "Failed to update workout log"}), 500
 
 @app.route("/get_exercise_details/<int:exercise_id>")
@@ -545,15 +635,22 @@ def get_exercise_details(exercise_id):
     """
 
 @app.route("/get_all_exercises")
+@etag_cached("exercises")
 def get_all_exercises():
     """Get all exercises without any filters."""
     try:
-        with DatabaseHandler() as db:
-            query = "SELECT exercise_name FROM exercises ORDER BY exercise_name"
-            results = db.fetch_all(query)
-            exercises = [result['exercise_name'] for result in results]
-            return jsonify(exercises)
+        return jsonify(get_catalog().exercise_names())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/search_exercises")
+def search_exercises_route():
+    """Autocomplete: the best `limit` exercise names for the typed prefix `q`."""
+    try:
+        limit = request.args.get("limit", 10, type=int)
+        return jsonify(search_exercises(request.args.get("q", ""), limit))
     except Exception as e:
+        logger.error("Error searching exercises: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/delete_workout_log', methods=['POST'])
@@ -572,8 +669,168 @@ def delete_workout_log():
         return jsonify({"message": "Log entry deleted successfully"}), 200
         
     except Exception as e:
-        print(f"Error deleting workout log: {str(e)}")
+        logger.error("Error deleting workout log: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/workout_log_rollups")
+@etag_cached("workout_log", "exercises")
+def workout_log_rollups():
+    """
+    Daily or weekly logged volume per exercise or muscle group for charts.
+    ?by=exercise|muscle_group, ?grain=day|week, ?start= and ?end= (YYYY-MM-DD),
+    and ?key= (repeatable) to limit the exercises or muscle groups returned.
+    The rollups are kept current by the write path; `lag` reports log
+    entries and days not yet reflected (both 0 normally).
+    """
+    try:
+        start = request.args.get("start", type=date.fromisoformat)
+        end = request.args.get("end", type=date.fromisoformat)
+        if (request.args.get("start") and start is None) or (request.args.get("end") and end is None):
+            return jsonify({"error": "start and end must be dates in YYYY-MM-DD format"}), 400
+        by = request.args.get("by", "exercise")
+        grain = request.args.get("grain", "day")
+        rows = get_rollups(by, grain, start, end, request.args.getlist("key"))
+        return jsonify({"by": by, "grain": grain, "rows": rows, "lag": get_rollup_lag()})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Error reading workout log rollups: %s", e)
+        return jsonify({"error": "Failed to read workout log rollups"}), 500
+
+@app.route("/progression")
+@etag_cached("workout_log")
+def progression():
+    """
+    Per-exercise estimated 1RM, volume load, trend and stall status from the workout log.
+    Optional ?exercise= (repeatable) limits the exercises; ?stalled=1 returns stalled ones only.
+    """
+    try:
+        results = get_progression()
+        exercises = set(request.args.getlist("exercise"))
+        if exercises:
+            results = [row for row in results if row["exercise"] in exercises]
+        if request.args.get("stalled", "").lower() in ("1", "true", "yes"):
+            results = [row for row in results if row["stalled"]]
+        return jsonify(results)
+    except Exception as e:
+        logger.error("Error computing progression: %s", e)
+        return jsonify({"error": "Failed to compute progression"}), 500
+
+@app.route("/exercise_substitutes")
+def exercise_substitutes():
+    """
+    Most similar exercises for ?exercise= or for every exercise of ?routine=.
+    Optional ?equipment= (allowed) and ?exclude_equipment= (busy) may repeat; ?k= sets the count.
+    """
+    try:
+        exercise = request.args.get("exercise")
+        routine = request.args.get("routine")
+        if bool(exercise) == bool(routine):
+            return jsonify({"error": "Pass exactly one of exercise or routine"}), 400
+
+        names = [exercise] if exercise else get_routine_exercises(routine)
+        index = get_catalog().similarity_index
+        substitutes = index.substitutes(
+            names,
+            k=request.args.get("k", 5, type=int),
+            equipment=request.args.getlist("equipment"),
+            exclude_equipment=request.args.getlist("exclude_equipment"),
+        )
+        if exercise and exercise not in substitutes:
+            return jsonify({"error": f"Unknown exercise '{exercise}'"}), 404
+
+        return jsonify({
+            "results": [
+                {
+                    "exercise": name,
+                    "substitutes": [
+                        {"exercise": candidate, "score": round(score, 4), "equipment": equipment}
+                        for candidate, score, equipment in substitutes[name]
+                    ],
+                }
+                for name in names if name in substitutes
+            ],
+            "missing": [name for name in names if name not in substitutes],
+        })
+    except Exception as e:
+        logger.error("Error finding exercise substitutes: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/import_catalog", methods=["POST"])
+def import_catalog_route():
+    """
+    Upsert exercises from an uploaded CSV, JSON lines or XLSX file (form field "file").
+    The format comes from the file name, or from ?format= for a raw request body.
+    """
+    if current_tenant() is not None:
+        # The catalog is shared by every user; only the import-catalog command may change it
+        return jsonify({"error": "Catalog imports are disabled in tenant mode"}), 403
+    try:
+        upload = request.files.get("file")
+        if upload is not None:
+            file_format = request.args.get("format") or detect_format(upload.filename)
+            stream = upload.stream
+        else:
+            file_format = request.args.get("format")
+            if not file_format:
+                return jsonify({"error": "Upload a file or pass ?format=csv|jsonl|xlsx"}), 400
+            stream = request.stream
+            if file_format == "xlsx":
+                stream = BytesIO(stream.read())  # openpyxl needs a seekable file
+        return jsonify(import_catalog(stream, file_format)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Error importing catalog: %s", e)
+        return jsonify({"error": "Failed to import catalog"}), 500
+
+@app.cli.command("import-catalog")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl", "xlsx"]), help="Defaults to the file extension.")
+@click.option("--chunk-size", type=int, default=None, help="Rows upserted per transaction.")
+def import_catalog_command(path, file_format, chunk_size):
+    """Upsert exercises from a CSV, JSON lines or XLSX file."""
+    file_format = file_format or detect_format(path)
+    kwargs = {"chunk_size": chunk_size} if chunk_size else {}
+    with open(path, "rb") as stream:
+        report = import_catalog(stream, file_format, **kwargs)
+    click.echo(
+        f"Inserted {report['inserted']}, updated {report['updated']}, unchanged {report['unchanged']}, "
+        f"duplicates {report['duplicates']}, invalid {report['invalid']}"
+    )
+    for error in report["errors"]:
+        click.echo(f"  row {error['row']}: {error['error']}", err=True)
+
+@app.cli.command("refresh-log-rollups")
+@click.option("--full", is_flag=True, help="Rebuild from the whole log, e.g. after muscle groups changed.")
+@click.option("--user", default=None, help="User whose shard to refresh (tenant mode).")
+def refresh_log_rollups_command(full, user):
+    """Bring the workout log rollup tables up to date."""
+    with tenant_scope(user):
+        changed = refresh_rollups(full=full)
+    click.echo("Rollups refreshed" if changed else "Rollups already up to date")
+
+def query_stats():
+    """Dump per-query timing aggregates, slowest total time first; POST also resets them."""
+    return jsonify(dump_query_stats(reset=request.method == "POST"))
+
+def query_cache_stats():
+    """Dump query result cache hit/miss counters; POST also resets them."""
+    return jsonify(dump_query_cache_stats(reset=request.method == "POST"))
+
+def register_stats_routes():
+    """
+    Serve the query statistics endpoints. They list the SQL of every query
+    without authentication, so they are only registered in debug mode or
+    with STATS_ENDPOINTS set.
+    """
+    if "query_stats" not in app.view_functions:
+        app.add_url_rule("/query_stats", view_func=query_stats, methods=["GET", "POST"])
+        app.add_url_rule("/query_cache_stats", view_func=query_cache_stats, methods=["GET", "POST"])
+
+if STATS_ENDPOINTS or app.debug:
+    register_stats_routes()
+
 if __name__ == "__main__":
+    register_stats_routes()  # Served with debug=True below
     app.run(debug=True)
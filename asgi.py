@@ -0,0 +1,20 @@
+"""
+ASGI entry point for the Hypertrophy Toolbox.
+
+Run with any ASGI server, e.g.:
+
+    uvicorn asgi:application --workers 2
+
+Flask is a WSGI app, so every request still holds one thread while it is
+served: a process serves at most ASGI_THREADS requests at once (a2wsgi's
+thread pool), like a threaded WSGI server, and further requests wait for
+a free thread. Raise ASGI_THREADS or --workers for more concurrent
+requests. Check that requests overlap with:
+
+    python -m scripts.check_asgi_concurrency
+"""
+from a2wsgi import WSGIMiddleware
+from app import app
+from utils.config import ASGI_THREADS
+
+application = WSGIMiddleware(app, workers=ASGI_THREADS)
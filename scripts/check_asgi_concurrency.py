@@ -0,0 +1,65 @@
+"""
+Check that the ASGI entry point's WSGI bridge serves requests concurrently.
+
+Sends concurrent requests that each block for a while through the same
+bridge and thread count as asgi.py, and fails unless they overlap:
+
+    python -m scripts.check_asgi_concurrency [requests] [seconds]
+"""
+import asyncio
+import sys
+import threading
+import time
+from a2wsgi import WSGIMiddleware
+from utils.config import ASGI_THREADS
+
+
+def check_concurrency(requests, seconds):
+    """
+    :return: Tuple of (elapsed seconds, names of the threads that served the requests).
+    """
+    threads = set()
+
+    def slow_app(environ, start_response):
+        threads.add(threading.current_thread().name)
+        time.sleep(seconds)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"ok"]
+
+    application = WSGIMiddleware(slow_app, workers=ASGI_THREADS)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "", "headers": [],
+        "server": ("localhost", 80), "client": ("127.0.0.1", 1234),
+    }
+
+    async def call():
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        await application(dict(scope), receive, send)
+
+    async def run_all():
+        await asyncio.gather(*(call() for _ in range(requests)))
+
+    started = time.perf_counter()
+    asyncio.run(run_all())
+    return time.perf_counter() - started, threads
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    elapsed, threads = check_concurrency(requests, seconds)
+    print(f"{requests} requests of {seconds}s finished in {elapsed:.2f}s on {len(threads)} thread(s)")
+    if requests > 1 and elapsed >= seconds * requests / 2:
+        print(f"Requests did not overlap (ASGI_THREADS={ASGI_THREADS})", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -270,6 +270,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 
                 // Remove any applied filter effects
                 exerciseDropdown.classList.remove('filter-applied');
+                updateFilterCounts();
                 showToast("All filters cleared");
             })
             .catch(error => {
@@ -283,8 +284,109 @@ document.addEventListener("DOMContentLoaded", () => {
     window.removeExercise = removeExercise;
     window.filterExercises = filterExercises;
 
+    // Autocomplete: fetch a handful of ranked matches per keystroke instead of the whole catalog
+    function initExerciseSearch() {
+        const searchInput = document.getElementById("exercise-search");
+        const results = document.getElementById("exercise-search-results");
+        const exerciseDropdown = document.getElementById("exercise");
+        if (!searchInput || !results || !exerciseDropdown) {
+            return;
+        }
+
+        let debounceTimer = null;
+        let controller = null;
+
+        searchInput.addEventListener("input", () => {
+            clearTimeout(debounceTimer);
+            const query = searchInput.value.trim();
+            if (!query) {
+                results.innerHTML = "";
+                return;
+            }
+            debounceTimer = setTimeout(async () => {
+                controller?.abort();  // Drop responses for keystrokes that are already stale
+                controller = new AbortController();
+                try {
+                    const response = await fetch(`/search_exercises?q=${encodeURIComponent(query)}&limit=10`, {
+                        signal: controller.signal
+                    });
+                    const names = await response.json();
+                    if (!response.ok) {
+                        throw new Error(names.error || "Search failed.");
+                    }
+                    results.innerHTML = "";
+                    names.forEach(name => {
+                        const option = document.createElement("option");
+                        option.value = name;
+                        results.appendChild(option);
+                    });
+                } catch (error) {
+                    if (error.name !== "AbortError") {
+                        console.error("Error searching exercises:", error);
+                    }
+                }
+            }, 150);
+        });
+
+        searchInput.addEventListener("change", () => {
+            const name = searchInput.value;
+            if (![...results.options].some(option => option.value === name)) {
+                return;
+            }
+            // The dropdown may be narrowed by filters; add the picked exercise if it is missing
+            if (![...exerciseDropdown.options].some(option => option.value === name)) {
+                const option = document.createElement("option");
+                option.value = name;
+                option.textContent = name;
+                exerciseDropdown.appendChild(option);
+            }
+            exerciseDropdown.value = name;
+        });
+    }
+
+    // Show how many exercises each filter option would leave, given the other selections
+    async function updateFilterCounts() {
+        const filterElements = document.querySelectorAll('#filters-form select.filter-dropdown');
+        const filters = {};
+        filterElements.forEach(select => {
+            if (select.value) {
+                filters[select.id] = select.value;
+            }
+        });
+
+        try {
+            const response = await fetch("/filter_facets", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify(filters)
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || "Failed to fetch filter counts");
+            }
+
+            filterElements.forEach(select => {
+                const counts = new Map((data.facets[select.id] || []).map(item => [item.value, item.count]));
+                [...select.options].forEach(option => {
+                    if (!option.value || !counts.has(option.value)) {
+                        return;
+                    }
+                    const count = counts.get(option.value);
+                    option.textContent = `${option.value} (${count})`;
+                    option.disabled = count === 0 && option.value !== select.value;
+                });
+            });
+        } catch (error) {
+            console.error("Error updating filter counts:", error);
+        }
+    }
+
     // Initialize event listeners
     document.getElementById("filter-btn")?.addEventListener("click", filterExercises);
+    document.querySelectorAll('#filters-form select.filter-dropdown').forEach(select => {
+        select.addEventListener("change", updateFilterCounts);
+    });
+    initExerciseSearch();
 
     document.getElementById('add-exercise-btn')?.addEventListener('click', function() {
         const exercise = document.getElementById('exercise').value;
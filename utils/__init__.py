@@ -21,6 +21,9 @@ from .volume_classifier import (
     get_subcategory_tooltip
 )
 from .workout_log import get_workout_logs
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 # Defining the module's public interface
 __all__ = [
@@ -52,8 +55,8 @@ def get_workout_logs():
     ORDER BY routine, exercise
     """
     try:
-        with DatabaseHandler() as db:
-            return db.fetch_all(query)
+        with DatabaseHandler(read_only=True) as db:
+            return db.fetch_all(query, cache=True)
     except Exception as e:
-        print(f"Error fetching workout logs: {e}")
+        logger.error("Error fetching workout logs: %s", e)
         return []
@@ -0,0 +1,232 @@
+import asyncio
+import concurrent.futures
+import functools
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_request_context
+from utils.config import DB_POOL_SIZE, DB_READ_WORKERS, DB_WRITE_QUEUE, DB_WRITE_TIMEOUT
+from utils.database import DatabaseHandler, get_current_pool, mark_read_worker
+from utils.db_writer import get_writer
+from utils.query_cache import query_cache
+from utils.tenancy import current_tenant, tenant_scope
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Characters not allowed in a Server-Timing metric name
+_NON_TOKEN = re.compile(r"[^A-Za-z0-9_.-]+")
+
+_executor = None
+_read_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """
+    Return the dedicated executor that runs blocking database work.
+    Sized to the connection pool so workers never wait on each other for a connection.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+    return _executor
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Await a blocking database function on the database executor.
+
+    Uses `loop.run_in_executor`, which (unlike `asyncio.to_thread`) does not
+    copy the caller's context, so the worker checks out its own pooled
+    connection instead of sharing the request's connection across threads.
+    Only the current user is carried over, so tenant mode reads the right shard.
+
+    :param func: Synchronous callable, e.g. `calculate_exercise_categories`.
+    :return: The callable's return value.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_call_as, current_tenant(), func, *args, **kwargs)
+    return await loop.run_in_executor(get_db_executor(), call)
+
+
+def _call_as(tenant_id, func, *args, **kwargs):
+    """Run `func` with database calls routed to `tenant_id`'s shard (None: shared database)."""
+    with tenant_scope(tenant_id):
+        return func(*args, **kwargs)
+
+
+def get_read_executor():
+    """
+    Return the executor that runs a request's independent reads side by side.
+    Kept apart from the database executor so a burst of reads never queues
+    writes. Its workers read through their own fan-out pool (see
+    utils.database.mark_read_worker), never the read-only pool that holds
+    the waiting requests' connections, and as all requests share its
+    DB_READ_WORKERS threads, their fan-out is bounded by that number.
+    """
+    global _read_executor
+    if _read_executor is None:
+        with _executor_lock:
+            if _read_executor is None:
+                _read_executor = ThreadPoolExecutor(
+                    max_workers=DB_READ_WORKERS, thread_name_prefix="db-read", initializer=mark_read_worker
+                )
+    return _read_executor
+
+
+def _timed_call_as(tenant_id, func):
+    """Run `func` as `tenant_id` (see _call_as) and return its result with its wall time in ms."""
+    started = time.perf_counter()
+    result = _call_as(tenant_id, func)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _submit_reads(reads):
+    tenant_id = current_tenant()
+    executor = get_read_executor()
+    return {name: executor.submit(_timed_call_as, tenant_id, func) for name, func in reads.items()}
+
+
+def _collect_reads(futures, started):
+    """
+    Results of finished reads by name, recording their timings.
+    :raises Exception: The first failed read's exception, once every read has finished.
+    """
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.debug(
+        "Parallel reads took %.1f ms: %s",
+        elapsed, ", ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()),
+    )
+    if has_request_context():
+        g.setdefault("read_timings", []).append((timings, elapsed))
+    return results
+
+
+def run_reads(reads):
+    """
+    Run independent reads side by side and wait for all of them, so the
+    caller waits for the slowest read rather than the sum of them.
+
+    Each read runs on the read executor in the current user's scope and
+    checks out its own connection from the read workers' pool, so reads do
+    not share the request's snapshot: only submit reads that do not depend on each other
+    or on writes made earlier in the same request.
+
+    :param reads: Mapping of name to a zero-argument callable, e.g.
+        `functools.partial(calculate_weekly_summary, method)`.
+    :return: Mapping of name to the callable's return value.
+    :raises Exception: The first failed read's exception, after every read finished.
+    """
+    started = time.perf_counter()
+    futures = _submit_reads(reads)
+    concurrent.futures.wait(futures.values())
+    return _collect_reads(futures, started)
+
+
+async def gather_reads(reads):
+    """
+    Awaitable run_reads for async views.
+    :param reads: Mapping of name to a zero-argument callable.
+    :return: Mapping of name to the callable's return value.
+    """
+    started = time.perf_counter()
+    futures = _submit_reads(reads)
+    await asyncio.wait([asyncio.wrap_future(future) for future in futures.values()])
+    return _collect_reads(futures, started)
+
+
+def _add_server_timing(response):
+    """
+    Report the request's parallel read timings in a Server-Timing header
+    (registered as after_request handler): one entry per read plus the
+    batch's wall time.
+    """
+    batches = g.pop("read_timings", None)
+    if batches:
+        entries = []
+        for index, (timings, elapsed) in enumerate(batches):
+            entries += [
+                f'{_NON_TOKEN.sub("-", name).lower()};dur={ms:.1f};desc="{name}"' for name, ms in timings.items()
+            ]
+            entries.append(f"reads{index or ''};dur={elapsed:.1f};desc=\"parallel reads\"")
+        response.headers.add("Server-Timing", ", ".join(entries))
+    return response
+
+
+def init_app(app):
+    """
+    Register reporting of parallel read timings on a Flask app.
+    """
+    app.after_request(_add_server_timing)
+
+
+class AsyncDatabaseHandler:
+    """
+    Awaitable counterpart of DatabaseHandler. Each call runs on the database
+    executor with its own pooled connection, so independent calls can be
+    awaited concurrently with `asyncio.gather`.
+    """
+
+    @staticmethod
+    def _fetch_all(query, params):
+        with DatabaseHandler(read_only=True) as db:
+            return db.fetch_all(query, params)
+
+    @staticmethod
+    def _fetch_one(query, params):
+        with DatabaseHandler(read_only=True) as db:
+            return db.fetch_one(query, params)
+
+    @staticmethod
+    def _execute(query, params):
+        with DatabaseHandler(read_only=False) as db:
+            return db.execute_query(query, params)
+
+    async def fetch_all(self, query, params=None):
+        """
+        Fetch all rows for a query.
+        :param query: SQL query to execute.
+        :param params: Optional parameters for parameterized queries.
+        :return: List of all rows fetched as dictionaries.
+        """
+        return await run_db(self._fetch_all, query, params)
+
+    async def fetch_one(self, query, params=None):
+        """
+        Fetch a single row for a query.
+        :param query: SQL query to execute.
+        :param params: Optional parameters for parameterized queries.
+        :return: Single row fetched as a dictionary.
+        """
+        return await run_db(self._fetch_one, query, params)
+
+    async def execute(self, query, params=None):
+        """
+        Execute and commit a write.
+        :param query: SQL query to execute.
+        :param params: Optional parameters for parameterized queries.
+        :return: The statement's lastrowid.
+        """
+        if DB_WRITE_QUEUE:
+            pool = get_current_pool()  # Opens (and migrates) the user's shard if needed
+            database = pool.database if pool.shard else None
+            future = get_writer().submit(query, params, database=database)
+            try:
+                lastrowid = await asyncio.wait_for(asyncio.wrap_future(future), DB_WRITE_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise sqlite3.OperationalError(
+                    f"Timed out after {DB_WRITE_TIMEOUT}s waiting for the database writer"
+                ) from None
+            if query_cache.enabled:
+                query_cache.invalidate_statement(query, scope=current_tenant())
+            return lastrowid
+        return await run_db(self._execute, query, params)
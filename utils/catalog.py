@@ -0,0 +1,148 @@
+import threading
+from collections import Counter
+from types import MappingProxyType
+from utils.database import DatabaseHandler
+from utils.data_versions import get_data_versions
+from utils.filter_index import FilterIndex, normalize
+from utils.similarity import SimilarityIndex
+from utils.migrations import FILTER_COLUMNS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _distinct_values(values):
+    """
+    One display value per normalized value (see filter_index.normalize), so
+    case or whitespace variants such as "Compound" and "compound" are a
+    single option. Each is shown in its most common spelling (ties go to
+    the first in sort order); the result is sorted.
+    """
+    spellings = {}
+    for value in values:
+        if value and value.strip():
+            spellings.setdefault(normalize(value), Counter())[value.strip()] += 1
+    return tuple(sorted(
+        min(counts, key=lambda spelling: (-counts[spelling], spelling)) for counts in spellings.values()
+    ))
+
+
+class ExerciseCatalog:
+    """
+    Immutable in-memory snapshot of the exercises table.
+
+    Built once per catalog version and shared by every request; callers get
+    copies of lists so the snapshot itself is never mutated.
+    """
+
+    def __init__(self, version, rows):
+        """
+        :param version: data_versions counter the rows were read at.
+        :param rows: Catalog rows as dictionaries, sorted by exercise_name.
+        """
+        self.version = version
+        self.rows = tuple(MappingProxyType(dict(row)) for row in rows)
+
+        by_name = {}
+        for row in self.rows:
+            by_name.setdefault(row["exercise_name"], row)  # First row (lowest id) wins for duplicate names
+        self._by_name = MappingProxyType(by_name)
+        self._names = tuple(name for name in by_name if name)
+
+        self._distinct = MappingProxyType({
+            column: _distinct_values(row[column] for row in self.rows) for column in FILTER_COLUMNS
+        })
+        self._filter_index = None
+        self._similarity_index = None
+
+    def exercise_names(self):
+        """
+        :return: Unique exercise names in ascending order.
+        """
+        return list(self._names)
+
+    def distinct_values(self, column):
+        """
+        Distinct non-empty values of a filterable column in ascending order,
+        one per case-insensitive value.
+        :param column: One of the FILTER_MAPPING database columns.
+        """
+        return list(self._distinct.get(column, ()))
+
+    @property
+    def filter_index(self):
+        """
+        Bitset inverted index over the filter columns, built on first use.
+        """
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(
+                [row for row in self.rows if row["exercise_name"]], FILTER_COLUMNS
+            )
+        return self._filter_index
+
+    @property
+    def similarity_index(self):
+        """
+        Normalized feature matrix for substitute lookups, built on first use.
+        """
+        if self._similarity_index is None:
+            self._similarity_index = SimilarityIndex(
+                [row for name, row in self._by_name.items() if name]
+            )
+        return self._similarity_index
+
+    def filter_exercises(self, filters):
+        """
+        Exercise names matching every filter, in ascending order.
+        :param filters: Mapping of database column to filter value.
+        """
+        return self.filter_index.filter(filters)
+
+    def facet_counts(self, filters):
+        """
+        For every filter column, each distinct value with the number of
+        exercises matching it together with the other columns' filters.
+        :param filters: Mapping of database column to the selected value.
+        :return: Mapping of column to a list of (value, count) pairs.
+        """
+        return self.filter_index.facets(filters, self._distinct)
+
+    def get(self, exercise_name):
+        """
+        :return: Read-only catalog row for an exercise, or None.
+        """
+        return self._by_name.get(exercise_name)
+
+    def muscle_group_counts(self):
+        """
+        Number of exercises per primary muscle group, most common first.
+        """
+        counts = Counter(row["primary_muscle_group"] for row in self.rows if row["primary_muscle_group"])
+        return counts.most_common()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """
+    Return the current catalog snapshot, reloading it when the exercises
+    table's version counter has moved since it was built.
+    """
+    global _catalog
+    with DatabaseHandler(read_only=True) as db:
+        version = get_data_versions(["exercises"], db)["exercises"]
+        if _catalog is not None and _catalog.version == version:
+            return _catalog
+        with _catalog_lock:
+            if _catalog is None or _catalog.version != version:
+                # The version is read before the rows, so a concurrent edit can
+                # only make this snapshot look older than it is, never newer.
+                rows = db.fetch_all(
+                    f"SELECT id, exercise_name, {', '.join(FILTER_COLUMNS)} "
+                    "FROM exercises ORDER BY exercise_name, id"
+                )
+                _catalog = ExerciseCatalog(version, rows)
+                logger.info("Loaded exercise catalog version %d (%d exercises)", version, len(rows))
+            return _catalog
@@ -0,0 +1,316 @@
+import csv
+import functools
+import io
+import json
+import os
+import sqlite3
+from itertools import islice
+from utils.config import CATALOG_IMPORT_CHUNK_SIZE
+from utils.database import get_pool
+from utils.migrations import (
+    EXERCISE_COLUMNS,
+    REBUILD_WEEKLY_SUMMARY,
+    SEARCH_COLUMNS,
+    has_exercise_search,
+    isolated_muscle_rows,
+)
+from utils.query_cache import invalidate_tables
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Supported file formats by extension
+IMPORT_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".xlsx": "xlsx",
+}
+
+# Longest exercise name accepted
+MAX_NAME_LENGTH = 200
+
+# Validation errors kept in the import report
+MAX_REPORTED_ERRORS = 50
+
+
+def detect_format(filename):
+    """
+    Import format for a file name, from its extension.
+    :raises ValueError: For unsupported extensions.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported catalog file type '{extension}'. Use CSV, JSON lines or XLSX.")
+    return IMPORT_FORMATS[extension]
+
+
+@functools.lru_cache(maxsize=256)
+def _column_name(header):
+    """Map a header such as 'Primary Muscle Group' or ' primary_muscle_group ' to its column."""
+    return "_".join(str(header or "").lower().split()).replace("-", "_")
+
+
+def _clean(value):
+    """Collapse whitespace; return None for blank values."""
+    if value is None:
+        return None
+    return " ".join(str(value).split()) or None
+
+
+def normalize_row(raw):
+    """
+    Validate and normalize one input row.
+
+    Headers are matched case-insensitively with spaces or dashes for
+    underscores; unknown columns are ignored. Attribute values are
+    lower-cased like the rest of the catalog, and comma-separated lists
+    are rewritten as "a, b".
+
+    :param raw: Mapping of header to value.
+    :return: Dictionary of catalog column to value, limited to the columns present.
+    :raises ValueError: When the row has no usable exercise name.
+    """
+    row = {}
+    for header, value in raw.items():
+        column = _column_name(header)
+        if column not in EXERCISE_COLUMNS:
+            continue
+        value = _clean(value)
+        if column != "exercise_name" and value is not None:
+            value = value.lower()
+            if "," in value:
+                value = ", ".join(part.strip() for part in value.split(",") if part.strip()) or None
+        row[column] = value
+
+    name = row.get("exercise_name")
+    if not name:
+        raise ValueError("exercise_name is required")
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"exercise_name longer than {MAX_NAME_LENGTH} characters")
+    return row
+
+
+def iter_csv_rows(stream):
+    """Yield rows of a CSV file as dictionaries. Accepts text or binary streams."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    yield from csv.DictReader(stream)
+
+
+def iter_jsonl_rows(stream):
+    """Yield the objects of a JSON lines file, one per non-blank line."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            item = ValueError(f"invalid JSON on line {line_number}: {e.msg}")
+        if not isinstance(item, (dict, ValueError)):
+            item = ValueError(f"line {line_number} is not a JSON object")
+        yield item
+
+
+def iter_xlsx_rows(stream):
+    """
+    Yield rows of the first worksheet, using the first row as headers.
+    Read-only mode keeps memory flat regardless of sheet size.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("XLSX import requires openpyxl (pip install openpyxl)") from e
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = next(rows, None)
+        if headers is None:
+            return
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+_READERS = {
+    "csv": iter_csv_rows,
+    "jsonl": iter_jsonl_rows,
+    "xlsx": iter_xlsx_rows,
+}
+
+
+class CatalogImporter:
+    """
+    Streams rows into the exercises catalog in chunks.
+
+    Each chunk is validated, looked up by exercise name and upserted with
+    executemany inside its own IMMEDIATE transaction, so readers keep
+    working and a failed chunk never leaves a half-applied write behind.
+    The chunk's transaction suspends the per-row exercises triggers (see
+    BULK_LOAD_GUARD) and refreshes the search index, isolated muscle map,
+    weekly summary and data version once per chunk instead.
+    Names are not unique in the catalog: an import updates the lowest-id
+    row for a name (the one the catalog serves) and inserts unknown names.
+    Columns absent from an input row are left untouched on update.
+    """
+
+    def __init__(self, chunk_size=CATALOG_IMPORT_CHUNK_SIZE):
+        """
+        :param chunk_size: Rows upserted per transaction.
+        """
+        self.chunk_size = max(1, int(chunk_size))
+        self._search = False
+        self.report = {"inserted": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "invalid": 0, "errors": []}
+
+    def run(self, rows):
+        """
+        Import an iterable of raw rows (mappings, or exceptions for unreadable rows).
+        :return: Report with inserted, updated, unchanged, duplicate and invalid counts and sample errors.
+        """
+        pool = get_pool()
+        connection = pool.acquire()
+        isolation_level = connection.isolation_level
+        connection.isolation_level = None  # Explicit per-chunk transactions
+        try:
+            self._search = has_exercise_search(connection)
+            numbered = enumerate(rows, start=1)
+            while True:
+                chunk = list(islice(numbered, self.chunk_size))
+                if not chunk:
+                    break
+                self._import_chunk(connection, chunk)
+        finally:
+            connection.isolation_level = isolation_level
+            pool.release(connection)
+        logger.info(
+            "Catalog import: %d inserted, %d updated, %d unchanged, %d invalid",
+            self.report["inserted"], self.report["updated"], self.report["unchanged"], self.report["invalid"],
+        )
+        return self.report
+
+    def _invalid(self, row_number, message):
+        self.report["invalid"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"row": row_number, "error": message})
+
+    def _import_chunk(self, connection, chunk):
+        # Validate first; the last occurrence of a name within the chunk wins
+        pending = {}
+        for row_number, raw in chunk:
+            if isinstance(raw, Exception):
+                self._invalid(row_number, str(raw))
+                continue
+            try:
+                row = normalize_row(raw)
+            except ValueError as e:
+                self._invalid(row_number, str(e))
+                continue
+            if row["exercise_name"] in pending:
+                self.report["duplicates"] += 1  # Superseded by a later row for the same name
+            pending[row["exercise_name"]] = row
+        if not pending:
+            return
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("INSERT INTO catalog_bulk_load DEFAULT VALUES")
+            existing = self._lookup(connection, list(pending))
+            last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM exercises").fetchone()[0]
+            inserts, updates, replaced = {}, {}, []
+            for name, row in pending.items():
+                current = existing.get(name)
+                if current is None:
+                    inserts.setdefault(tuple(row), []).append(tuple(row.values()))
+                    continue
+                columns = tuple(column for column in row if column != "exercise_name")
+                if all(current[column] == row[column] for column in columns):
+                    self.report["unchanged"] += 1
+                    continue
+                updates.setdefault(columns, []).append(tuple(row[column] for column in columns) + (current["id"],))
+                replaced.append(current)
+
+            if self._search and replaced:
+                # External-content FTS needs the old values to remove a row's terms
+                connection.executemany(
+                    f"INSERT INTO exercises_fts (exercises_fts, rowid, {', '.join(SEARCH_COLUMNS)}) "
+                    f"VALUES ('delete', ?, {', '.join('?' for _ in SEARCH_COLUMNS)})",
+                    [(row["id"], *(row[column] for column in SEARCH_COLUMNS)) for row in replaced],
+                )
+            for columns, params in inserts.items():
+                connection.executemany(
+                    f"INSERT INTO exercises ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    params,
+                )
+                self.report["inserted"] += len(params)
+            for columns, params in updates.items():
+                connection.executemany(
+                    f"UPDATE exercises SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                    params,
+                )
+                self.report["updated"] += len(params)
+            if inserts or updates:
+                self._sync_dependents(connection, last_id, [row["id"] for row in replaced])
+            connection.execute("DELETE FROM catalog_bulk_load")
+            connection.execute("COMMIT")
+            if inserts or updates:
+                invalidate_tables("exercises")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+    def _sync_dependents(self, connection, last_id, updated_ids):
+        """
+        Set-wise equivalent of the suspended exercises triggers for rows
+        inserted after `last_id` and for `updated_ids`.
+        """
+        touched = "(e.id > ? OR e.id IN (SELECT value FROM json_each(?)))"
+        params = (last_id, json.dumps(updated_ids))
+        connection.execute(
+            "DELETE FROM exercise_isolated_muscle WHERE exercise_id IN (SELECT value FROM json_each(?))",
+            (params[1],),
+        )
+        connection.execute(
+            "INSERT OR IGNORE INTO exercise_isolated_muscle (exercise_id, exercise_name, isolated_muscle) "
+            f"{isolated_muscle_rows('e', 'exercises')} AND {touched}",
+            params,
+        )
+        if self._search:
+            columns = ", ".join(SEARCH_COLUMNS)
+            connection.execute(
+                f"INSERT INTO exercises_fts (rowid, {columns}) SELECT e.id, {columns} FROM exercises AS e WHERE {touched}",
+                params,
+            )
+        for statement in REBUILD_WEEKLY_SUMMARY:  # Plan-sized, so cheaper than tracking affected names
+            connection.execute(statement)
+        connection.execute("UPDATE data_versions SET version = version + 1 WHERE table_name = 'exercises'")
+
+    @staticmethod
+    def _lookup(connection, names):
+        """Lowest-id catalog row for each of `names` that exists."""
+        placeholders = ", ".join("?" for _ in names)
+        cursor = connection.execute(
+            f"SELECT id, {', '.join(EXERCISE_COLUMNS)} FROM exercises "
+            f"WHERE exercise_name IN ({placeholders}) ORDER BY id DESC",
+            names,
+        )
+        return {row["exercise_name"]: row for row in cursor}  # Descending ids: the lowest id is kept
+
+
+def import_catalog(stream, file_format, chunk_size=CATALOG_IMPORT_CHUNK_SIZE):
+    """
+    Stream a CSV, JSON lines or XLSX file into the exercises catalog.
+    :param stream: Binary file object (XLSX needs a seekable one).
+    :param file_format: "csv", "jsonl" or "xlsx"; see detect_format.
+    :param chunk_size: Rows upserted per transaction.
+    :return: Import report dictionary.
+    """
+    reader = _READERS.get(file_format)
+    if reader is None:
+        raise ValueError(f"Unsupported catalog format '{file_format}'")
+    return CatalogImporter(chunk_size).run(reader(stream))
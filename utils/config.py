@@ -9,6 +9,51 @@ LOGS_DIR = os.path.join(BASE_DIR, "logs")  # Centralized logs folder
 # Database File
 DB_FILE = os.getenv("DB_FILE", os.path.join(DATA_DIR, "database.db"))  # Allow override via environment variable
 
+# Connection Pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))  # Maximum number of pooled SQLite connections
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", "16"))  # Maximum number of pooled read-only connections
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Seconds to wait for a free pooled connection
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))  # Seconds SQLite waits on a locked database
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "8"))  # Threads running requests' independent reads in parallel, each with its own read-only connection
+
+# Write Queue
+DB_WRITE_QUEUE = os.getenv("DB_WRITE_QUEUE", "1").lower() in ("1", "true", "yes")  # Route writes through the single writer thread
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))  # Maximum writes committed in one transaction
+DB_WRITE_RETRIES = int(os.getenv("DB_WRITE_RETRIES", "5"))  # Retries when another process holds the write lock
+DB_WRITE_BACKOFF = float(os.getenv("DB_WRITE_BACKOFF", "0.05"))  # Initial retry delay in seconds, doubled per retry
+DB_WRITE_TIMEOUT = float(os.getenv("DB_WRITE_TIMEOUT", "30"))  # Seconds a caller waits for the writer thread before failing
+
+# ASGI Server
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "16"))  # Threads serving requests under an ASGI server (asgi.py); each request holds one, so this caps concurrent requests per process
+
+# Multi-Tenant Mode
+TENANT_MODE = os.getenv("TENANT_MODE", "0").lower() in ("1", "true", "yes")  # Give every user their own plan/log shard; DB_FILE holds the shared catalog
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-User-Id")  # Request header carrying the user id (set by the authenticating proxy)
+TENANT_DIR = os.getenv("TENANT_DIR", os.path.join(DATA_DIR, "tenants"))  # Root folder of the per-user shard files
+TENANT_SHARD_CACHE_SIZE = int(os.getenv("TENANT_SHARD_CACHE_SIZE", "128"))  # Shards kept open (LRU); least recently used are closed
+TENANT_POOL_SIZE = int(os.getenv("TENANT_POOL_SIZE", "4"))  # Maximum connections per shard and mode (read-write / read-only)
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG enables per-query and result-set logging
+
+# Query Instrumentation
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))  # Statements at or above this wall time go to logs/slow_queries.log
+QUERY_STATS_SAMPLES = int(os.getenv("QUERY_STATS_SAMPLES", "1000"))  # Recent timings kept per fingerprint for percentiles
+STATS_ENDPOINTS = os.getenv("STATS_ENDPOINTS", "0").lower() in ("1", "true", "yes")  # Serve /query_stats and /query_cache_stats (they expose SQL; always on in debug mode)
+
+# Query Result Cache
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))  # Cached read results kept (LRU); 0 disables the cache
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))  # Seconds a cached result stays valid (bounds staleness from other processes)
+
+# Catalog Import
+CATALOG_IMPORT_CHUNK_SIZE = int(os.getenv("CATALOG_IMPORT_CHUNK_SIZE", "5000"))  # Rows validated and upserted per transaction
+
+# Exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # Rows fetched from the cursor at a time while exporting
+EXPORT_SPOOL_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE", str(1024 * 1024)))  # Bytes of an export file kept in memory before spilling to a temp file
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", str(64 * 1024)))  # Bytes per chunk when streaming an export file to the client
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "65536"))  # Rows per Parquet row group (rows buffered in memory at once)
+
 # Application Constants
 APP_TITLE = "Workout Tracker"
 
@@ -0,0 +1,92 @@
+from utils.database import DatabaseHandler
+from utils.session_summary import calculate_session_summary
+from utils.summary_engine import SUMMARY_METHODS
+from utils.weekly_summary import (
+    calculate_weekly_summary,
+    calculate_exercise_categories,
+    calculate_isolated_muscles_stats,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# The current plan with each exercise's muscle groups, as served by /get_workout_plan
+WORKOUT_PLAN_QUERY = """
+    SELECT
+        us.id, us.routine, us.exercise, us.sets,
+        us.min_rep_range, us.max_rep_range, us.rir, us.weight,
+        e.primary_muscle_group, e.secondary_muscle_group,
+        e.tertiary_muscle_group, e.advanced_isolated_muscles,
+        e.utility, e.grips, e.stabilizers, e.synergists
+    FROM user_selection us
+    LEFT JOIN exercises e ON us.exercise = e.exercise_name
+    ORDER BY us.routine, us.exercise
+"""
+
+
+def _plan():
+    with DatabaseHandler(read_only=True) as db:
+        return db.fetch_all(WORKOUT_PLAN_QUERY, cache=True)
+
+
+# Section name -> (loader, per method); per-method sections are keyed by method in the response
+DASHBOARD_SECTIONS = {
+    "plan": (_plan, False),
+    "weekly_summary": (calculate_weekly_summary, True),
+    "session_summary": (calculate_session_summary, True),
+    "categories": (calculate_exercise_categories, False),
+    "isolated_muscles": (calculate_isolated_muscles_stats, False),
+}
+
+
+def parse_methods(values):
+    """
+    Methods requested through repeated and/or comma-separated values.
+    :param values: E.g. ["Total,Direct"]; "all" selects every method; empty selects Total.
+    :return: Methods in SUMMARY_METHODS order, without duplicates.
+    :raises ValueError: For an unknown method.
+    """
+    requested = {value.strip() for item in values for value in item.split(",") if value.strip()}
+    if "all" in requested:
+        return list(SUMMARY_METHODS)
+    unknown = requested - set(SUMMARY_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown method(s): {', '.join(sorted(unknown))}. Use {', '.join(SUMMARY_METHODS)} or all")
+    return [method for method in SUMMARY_METHODS if method in requested] or ["Total"]
+
+
+def parse_fields(values):
+    """
+    Sections selected by a field mask of repeated and/or comma-separated names.
+    :param values: E.g. ["weekly_summary,categories"]; empty selects every section.
+    :return: Section names in DASHBOARD_SECTIONS order.
+    :raises ValueError: For an unknown section.
+    """
+    requested = {value.strip() for item in values for value in item.split(",") if value.strip()}
+    unknown = requested - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}. Use {', '.join(DASHBOARD_SECTIONS)}")
+    return [field for field in DASHBOARD_SECTIONS if not requested or field in requested]
+
+
+def build_dashboard(methods, fields):
+    """
+    Every requested summary-page section in one response.
+
+    Sections are loaded one after another through the request's read-only
+    connection, so all of them come from the request's single read
+    snapshot (unlike the parallel reads of /weekly_summary). The plan
+    summaries of every method come from one summary engine pass, so asking
+    for several methods costs little more than one.
+
+    :param methods: Methods for per-method sections (see parse_methods).
+    :param fields: Sections to include (see parse_fields).
+    :return: {"methods": [...], <section>: rows or {method: rows}, ...}.
+    """
+    dashboard = {"methods": methods}
+    for field in fields:
+        loader, per_method = DASHBOARD_SECTIONS[field]
+        dashboard[field] = {method: loader(method) for method in methods} if per_method else loader()
+    logger.debug("Built dashboard with %s for %s", fields, methods)
+    return dashboard
@@ -0,0 +1,241 @@
+import csv
+import io
+import json
+from utils.config import EXPORT_ROW_GROUP_SIZE
+from utils.dashboard import WORKOUT_PLAN_QUERY
+from utils.database import DatabaseHandler
+from utils.summary_engine import SUMMARY_METHODS, get_summaries
+from utils.weekly_summary import calculate_exercise_categories, calculate_isolated_muscles_stats
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Datasets streamed from a cursor: name -> (query, tables whose declared column types describe it)
+_QUERY_DATASETS = {
+    "workout_plan": (WORKOUT_PLAN_QUERY, ("user_selection", "exercises")),
+    "workout_log": ("SELECT * FROM workout_log ORDER BY id", ("workout_log",)),
+}
+
+
+def _method_rows(kind):
+    """One summary kind for every method, with the method as first column."""
+    summaries = get_summaries()
+    return [{"method": method, **row} for method in SUMMARY_METHODS for row in summaries[method][kind]]
+
+
+# Small datasets computed in memory: name -> (loader returning a list of
+# dictionaries, column -> SQLite-style type). The fixed columns keep the
+# header and Parquet schema even when a dataset has no rows.
+_SUMMARY_DATASETS = {
+    "weekly_summary": (lambda: _method_rows("weekly"), {
+        "method": "TEXT", "muscle_group": "TEXT",
+        "total_sets": "REAL", "total_reps": "REAL", "total_weight": "REAL",
+    }),
+    "session_summary": (lambda: _method_rows("session"), {
+        "method": "TEXT", "routine": "TEXT", "muscle_group": "TEXT",
+        "total_sets": "REAL", "total_reps": "REAL", "total_volume": "REAL",
+    }),
+    "categories": (calculate_exercise_categories, {
+        "category": "TEXT", "subcategory": "TEXT", "total_exercises": "INTEGER",
+    }),
+    "isolated_muscles": (calculate_isolated_muscles_stats, {
+        "isolated_muscle": "TEXT", "exercise_count": "INTEGER",
+        "total_sets": "INTEGER", "total_reps": "REAL", "total_volume": "REAL",
+    }),
+}
+
+EXPORT_DATASETS = (*_QUERY_DATASETS, *_SUMMARY_DATASETS)
+
+
+def check_export(dataset, file_format):
+    """
+    Validate an export request before any bytes are sent.
+    :raises ValueError: For an unknown dataset or format, or Parquet without pyarrow.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Use one of: {', '.join(EXPORT_DATASETS)}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{file_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if file_format == "parquet":
+        _pyarrow()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _drain(buffer):
+    """Encoded contents of a text buffer, emptying it."""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return text.encode("utf-8")
+
+
+def _csv_chunks(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield _drain(buffer)
+    for batch in batches:
+        writer.writerows(batch)
+        yield _drain(buffer)
+
+
+def _ndjson_chunks(columns, batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in batch).encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file that hands out what was written since the last take()."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_type(pa, declared, values):
+    """
+    Column type from its declared SQLite type, else inferred from the first
+    row group's values. Undeterminable columns are stored as strings.
+    """
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    if any(name in declared for name in ("CHAR", "CLOB", "TEXT", "TIME", "DATE")):
+        return pa.string()
+    inferred = pa.array(values).type
+    return pa.string() if pa.types.is_null(inferred) else inferred
+
+
+def _arrow_array(pa, values, arrow_type):
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if not pa.types.is_string(arrow_type):
+            raise
+        return pa.array([value if value is None else str(value) for value in values], type=arrow_type)
+
+
+def _parquet_chunks(columns, batches, declared_types):
+    """
+    Write Parquet one row group of EXPORT_ROW_GROUP_SIZE rows at a time,
+    yielding each group's bytes as soon as it is written. The schema is
+    fixed by the first group, so every group is cast to it.
+    """
+    pa = _pyarrow()
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    pending = []
+
+    def row_group():
+        nonlocal schema, writer
+        values = list(zip(*pending))
+        if schema is None:
+            schema = pa.schema([
+                (name, _arrow_type(pa, declared_types.get(name), column))
+                for name, column in zip(columns, values)
+            ])
+            writer = pa.parquet.ParquetWriter(sink, schema)
+        arrays = [_arrow_array(pa, column, field.type) for column, field in zip(values, schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        pending.clear()
+
+    for batch in batches:
+        pending.extend(batch)
+        if len(pending) >= EXPORT_ROW_GROUP_SIZE:
+            row_group()
+            yield sink.take()
+    if pending or writer is None:
+        if not pending:
+            # No rows at all: an empty file that still carries the column names
+            schema = pa.schema([(name, _arrow_type(pa, declared_types.get(name), [])) for name in columns])
+            writer = pa.parquet.ParquetWriter(sink, schema)
+        else:
+            row_group()
+    writer.close()
+    yield sink.take()
+
+
+def _declared_types(db, tables):
+    """Declared SQLite type of every column of `tables`; the first table wins on shared names."""
+    types = {}
+    for table in tables:
+        for column in db.fetch_all(f"PRAGMA table_info({table})"):
+            types.setdefault(column["name"], column["type"])
+    return types
+
+
+def stream_export(dataset, file_format):
+    """
+    Yield an export's bytes as they are produced.
+
+    Cursor datasets are read in cursor.fetchmany batches (see
+    DatabaseHandler.fetch_batches), so memory stays flat and the first
+    bytes go out before the last rows are read; summary datasets are small
+    and computed in memory. Inside a request, stream it with Flask's
+    stream_with_context so the request's connection (and its snapshot)
+    stays open until the last chunk.
+
+    :param dataset: One of EXPORT_DATASETS.
+    :param file_format: One of EXPORT_FORMATS.
+    """
+    check_export(dataset, file_format)
+    with DatabaseHandler(read_only=True) as db:
+        if dataset in _QUERY_DATASETS:
+            query, tables = _QUERY_DATASETS[dataset]
+            columns, batches = db.fetch_batches(query)
+            declared_types = _declared_types(db, tables) if file_format == "parquet" else {}
+        else:
+            loader, declared_types = _SUMMARY_DATASETS[dataset]
+            columns = list(declared_types)
+            batches = iter([[tuple(row.get(column) for column in columns) for row in loader()]])
+        if file_format == "csv":
+            chunks = _csv_chunks(columns, batches)
+        elif file_format == "ndjson":
+            chunks = _ndjson_chunks(columns, batches)
+        else:
+            chunks = _parquet_chunks(columns, batches, declared_types)
+        sent = 0
+        for chunk in chunks:
+            if chunk:
+                sent += len(chunk)
+                yield chunk
+        logger.debug("Exported %s as %s (%d bytes)", dataset, file_format, sent)
@@ -1,5 +1,8 @@
 import sqlite3
 from utils.database import DatabaseHandler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class DataHandler:
@@ -34,10 +37,10 @@ class DataHandler:
         JOIN exercises e ON us.exercise = e.exercise_name;
         """
         try:
-            with DatabaseHandler() as db:
+            with DatabaseHandler(read_only=True) as db:
                 results = db.fetch_all(query)
                 if not results:
-                    print("DEBUG: No user selection data found.")
+                    logger.debug("No user selection data found.")
                 return [
                     {
                         "id": row["id"],
@@ -60,7 +63,7 @@ class DataHandler:
                     for row in results
                 ]
         except Exception as e:
-            print(f"Error fetching user selection: {e}")
+            logger.error("Error fetching user selection: %s", e)
             return []
 
     @staticmethod
@@ -87,23 +90,21 @@ class DataHandler:
                     (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight),
                 )
                 if duplicate_count and duplicate_count["count"] > 0:
-                    print("DEBUG: Duplicate entry detected.")
+                    logger.debug("Duplicate entry detected.")
                     return None
 
                 # Insert new exercise
-                db.cursor.execute(
+                new_id = db.execute_query(
                     insert_query,
                     (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight),
                 )
-                db.connection.commit()
-                new_id = db.cursor.lastrowid
-                print(f"DEBUG: New exercise added with ID: {new_id}")
+                logger.debug("New exercise added with ID: %s", new_id)
                 return new_id
         except sqlite3.OperationalError as oe:
-            print(f"Operational error adding exercise: {oe}")
+            logger.error("Operational error adding exercise: %s", oe)
             return None
         except Exception as e:
-            print(f"Error adding exercise: {e}")
+            logger.error("Error adding exercise: %s", e)
             return None
 
     @staticmethod
@@ -115,9 +116,9 @@ class DataHandler:
         try:
             with DatabaseHandler() as db:
                 db.execute_query(query, (exercise_id,))
-                print(f"DEBUG: Exercise with ID {exercise_id} removed.")
+                logger.debug("Exercise with ID %s removed.", exercise_id)
         except Exception as e:
-            print(f"Error removing exercise: {e}")
+            logger.error("Error removing exercise: %s", e)
 
     @staticmethod
     def fetch_unique_values(table, column):
@@ -126,11 +127,11 @@ class DataHandler:
         """
         query = f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column} ASC"
         try:
-            with DatabaseHandler() as db:
+            with DatabaseHandler(read_only=True) as db:
                 results = db.fetch_all(query)
                 if not results:
-                    print(f"DEBUG: No unique values found for {column} in {table}.")
+                    logger.debug("No unique values found for %s in %s.", column, table)
                 return [row[column] for row in results if column in row]
         except Exception as e:
-            print(f"Error fetching unique values for column '{column}' in table '{table}': {e}")
+            logger.error("Error fetching unique values for column '%s' in table '%s': %s", column, table, e)
             return []
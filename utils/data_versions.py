@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import inspect
+from flask import request, make_response
+from utils.config import TENANT_MODE, TENANT_HEADER
+from utils.database import DatabaseHandler
+from utils.tenancy import CATALOG_SCHEMA, SHARD_TABLES, current_tenant
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_data_versions(tables, db=None):
+    """
+    Read the change counters that triggers keep in data_versions.
+    :param tables: Table names to look up.
+    :param db: Optional open DatabaseHandler to read through.
+    :return: Dictionary of table name to version; unknown tables map to 0.
+    """
+    tables = list(tables)
+    if db is not None:
+        rows = db.fetch_all(*_versions_query(tables, db.tenant))
+    else:
+        with DatabaseHandler(read_only=True) as db:
+            rows = db.fetch_all(*_versions_query(tables, db.tenant))
+    versions = {row["table_name"]: row["version"] for row in rows}
+    return {table: versions.get(table, 0) for table in tables}
+
+
+def _versions_query(tables, tenant):
+    """
+    Query and params reading `tables`' versions. On a user shard, the shard's
+    own tables are versioned in its data_versions and the rest in the catalog's.
+    """
+    if tenant is None:
+        placeholders = ", ".join("?" for _ in tables)
+        return f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})", tables
+    shard = [table for table in tables if table in SHARD_TABLES]
+    catalog = [table for table in tables if table not in SHARD_TABLES]
+    query = f"""
+        SELECT table_name, version FROM main.data_versions WHERE table_name IN ({", ".join("?" for _ in shard)})
+        UNION ALL
+        SELECT table_name, version FROM {CATALOG_SCHEMA}.data_versions WHERE table_name IN ({", ".join("?" for _ in catalog)})
+    """
+    return query, shard + catalog
+
+
+def make_etag(tables, extra=""):
+    """
+    ETag for the current request over the given tables: changes whenever one
+    of them is written or `extra` changes, and differs per URL, Accept
+    header and user.
+    """
+    versions = get_data_versions(tables)
+    key = "|".join([
+        current_tenant() or "",
+        request.full_path,
+        request.headers.get("Accept", ""),
+        extra,
+        *(f"{table}={versions[table]}" for table in sorted(versions)),
+    ])
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def etag_cached(*tables, when=None, key=None):
+    """
+    Decorate a GET view with ETag / If-None-Match handling.
+
+    The ETag is derived from the data versions of `tables`, so a matching
+    If-None-Match is answered with 304 before the view (and its queries) runs.
+    Only successful responses are tagged, so an error is never revalidated
+    as current. Works for both sync and async views.
+
+    :param tables: Tables whose contents the view's response depends on.
+    :param when: Optional predicate; requests for which it returns False
+                 bypass caching (e.g. HTML renders of a JSON endpoint).
+    :param key: Optional callable returning a string that describes other
+                inputs of the response, such as configuration; the ETag
+                changes with it.
+    """
+    def decorator(view):
+        def check():
+            if when is not None and not when():
+                return None, None
+            etag = make_etag(tables, key() if key is not None else "")
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+                finish(response, etag)
+                return etag, response
+            return etag, None
+
+        def finish(rv, etag):
+            response = make_response(rv)
+            if etag is not None and response.status_code in (200, 304):
+                response.set_etag(etag, weak=True)
+                response.headers["Cache-Control"] = "no-cache"  # Always revalidate
+                response.vary.add("Accept")
+                if TENANT_MODE:
+                    response.vary.add(TENANT_HEADER)
+            return response
+
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                etag, not_modified = check()
+                if not_modified is not None:
+                    return not_modified
+                return finish(await view(*args, **kwargs), etag)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, not_modified = check()
+            if not_modified is not None:
+                return not_modified
+            return finish(view(*args, **kwargs), etag)
+        return wrapper
+    return decorator
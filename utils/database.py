@@ -1,5 +1,338 @@
-from utils.config import DB_FILE
+from utils.config import (
+    DB_FILE, DB_POOL_SIZE, DB_READER_POOL_SIZE, DB_POOL_TIMEOUT, DB_BUSY_TIMEOUT, DB_WRITE_QUEUE,
+    DB_READ_WORKERS, TENANT_SHARD_CACHE_SIZE, TENANT_POOL_SIZE, EXPORT_BATCH_SIZE,
+)
+from utils.query_stats import record_query
+from utils.db_writer import get_writer, wait_for_write
+from utils.query_cache import query_cache
+from utils.tenancy import attach_catalog, current_tenant, shard_path
+from collections import OrderedDict
+from flask import g, has_app_context, has_request_context, request
+from pathlib import Path
+import os
 import sqlite3
+import threading
+import time
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-aware pool of SQLite connections.
+
+    Connections are opened lazily, configured once (WAL mode, row factory,
+    busy timeout) and handed out to one thread at a time. A read-only pool
+    opens `mode=ro` connections with `query_only` set, which in WAL mode
+    never take the write lock. A shard pool additionally attaches the
+    shared catalog to every connection.
+    """
+
+    def __init__(self, database=DB_FILE, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, read_only=False,
+                 shard=False):
+        """
+        :param database: Path to the SQLite database file.
+        :param max_size: Maximum number of connections open at once.
+        :param timeout: Seconds to wait for a free connection before giving up.
+        :param read_only: Open read-only connections.
+        :param shard: The file is a user shard; attach the catalog read-only.
+        """
+        self.database = database
+        self.read_only = read_only
+        self.shard = shard
+        self.max_size = max_size
+        self.timeout = timeout
+        self.closed = False
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _connect(self):
+        """
+        Open and configure a new connection. PRAGMAs are issued only here.
+        """
+        if self.read_only:
+            uri = f"{Path(self.database).resolve().as_uri()}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON;")  # Refuse writes even through ATTACHed files
+        elif self.shard:
+            uri = Path(self.database).resolve().as_uri()
+            connection = sqlite3.connect(uri, uri=True, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL;")
+        else:
+            connection = sqlite3.connect(self.database, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL;")  # Enable Write-Ahead Logging (WAL) mode
+        if self.shard:
+            attach_catalog(connection)
+        connection.row_factory = sqlite3.Row  # Return results as dictionaries
+        return connection
+
+    def acquire(self):
+        """
+        Check out a connection, opening a new one if none is idle.
+        :return: A configured sqlite3 connection.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Connection pool exhausted ({self.max_size} connections in use)"
+            )
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        """
+        Return a connection to the pool, discarding it if it is unusable.
+        :param connection: Connection previously returned by `acquire`.
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            with self._lock:
+                if self.closed:
+                    connection.close()
+                else:
+                    self._idle.append(connection)
+        except sqlite3.Error:
+            connection.close()
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """
+        Close every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def close(self):
+        """
+        Close idle connections now and checked-out ones as they are released.
+        """
+        with self._lock:
+            self.closed = True
+        self.close_all()
+
+
+_pool = None
+_reader_pool = None
+_fan_out_pool = None
+_pool_lock = threading.Lock()
+
+# Marks the threads that run a request's parallel reads (see mark_read_worker)
+_read_worker = threading.local()
+
+
+def mark_read_worker():
+    """
+    Route the calling thread's read-only connections to the fan-out pools
+    (initializer of utils.async_database's read executor). Each read worker
+    holds at most one connection, so a fan-out pool with one connection per
+    worker never runs dry, and the requests' own connections in the
+    read-only pool cannot starve the reads they are waiting for.
+    """
+    _read_worker.active = True
+
+
+def _is_read_worker():
+    return getattr(_read_worker, "active", False)
+
+
+def get_pool(read_only=False, fan_out=False):
+    """
+    Return the process-wide connection pool, creating it on first use.
+    :param read_only: Return the separate read-only pool instead.
+    :param fan_out: With read_only, return the read workers' own read-only pool.
+    """
+    global _pool, _reader_pool, _fan_out_pool
+    if read_only and fan_out:
+        if _fan_out_pool is None:
+            with _pool_lock:
+                if _fan_out_pool is None:
+                    _fan_out_pool = ConnectionPool(max_size=DB_READ_WORKERS, read_only=True)
+        return _fan_out_pool
+    if read_only:
+        if _reader_pool is None:
+            with _pool_lock:
+                if _reader_pool is None:
+                    _reader_pool = ConnectionPool(max_size=DB_READER_POOL_SIZE, read_only=True)
+        return _reader_pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+class ShardRegistry:
+    """
+    Lazily opened per-user shard pools with LRU eviction.
+
+    A shard is opened (its folder created and schema migrated) on the
+    first request for its user. At most `max_open` shards keep pools;
+    opening another closes the least recently used one, so a process can
+    serve any number of users with a bounded number of file handles.
+    """
+
+    def __init__(self, max_open=TENANT_SHARD_CACHE_SIZE, pool_size=TENANT_POOL_SIZE):
+        """
+        :param max_open: Shards kept open at once.
+        :param pool_size: Maximum connections per shard pool.
+        """
+        self.max_open = max(1, max_open)
+        self.pool_size = pool_size
+        self._shards = OrderedDict()  # tenant id -> (read-write pool, read-only pool, fan-out pool)
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id, read_only=False, fan_out=False):
+        """
+        Pool for a user's shard, opening the shard if needed.
+        :param tenant_id: User id (see utils.tenancy).
+        :param read_only: Return the shard's read-only pool.
+        :param fan_out: With read_only, return the shard's pool for read workers.
+        """
+        with self._lock:
+            pools = self._shards.get(tenant_id)
+            if pools is not None:
+                self._shards.move_to_end(tenant_id)
+            else:
+                pools = self._shards[tenant_id] = self._open(tenant_id)
+                while len(self._shards) > self.max_open:
+                    _, evicted = self._shards.popitem(last=False)
+                    for pool in evicted:
+                        pool.close()
+        if read_only:
+            return pools[2] if fan_out else pools[1]
+        return pools[0]
+
+    def _open(self, tenant_id):
+        from utils.migrations import TENANT_MIGRATIONS, apply_migrations  # migrations imports this module
+
+        path = shard_path(tenant_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer_pool = ConnectionPool(path, max_size=self.pool_size, shard=True)
+        apply_migrations(TENANT_MIGRATIONS, pool=writer_pool)
+        reader_pool = ConnectionPool(path, max_size=self.pool_size, read_only=True, shard=True)
+        fan_out_pool = ConnectionPool(path, max_size=DB_READ_WORKERS, read_only=True, shard=True)
+        logger.debug("Opened shard for user %s", tenant_id)
+        return writer_pool, reader_pool, fan_out_pool
+
+    def close_all(self):
+        """Close every open shard."""
+        with self._lock:
+            shards, self._shards = list(self._shards.values()), OrderedDict()
+        for pools in shards:
+            for pool in pools:
+                pool.close()
+
+
+_shards = None
+
+
+def get_shard_registry():
+    """Return the process-wide shard registry, creating it on first use."""
+    global _shards
+    if _shards is None:
+        with _pool_lock:
+            if _shards is None:
+                _shards = ShardRegistry()
+    return _shards
+
+
+def get_current_pool(read_only=False):
+    """
+    Pool for the current user's shard in tenant mode, else the shared pool.
+    On a read worker (see mark_read_worker), read-only connections come
+    from the fan-out pool.
+    :param read_only: Return the read-only pool.
+    """
+    tenant_id = current_tenant()
+    fan_out = read_only and _is_read_worker()
+    if tenant_id is None:
+        return get_pool(read_only, fan_out)
+    return get_shard_registry().get(tenant_id, read_only, fan_out)
+
+
+def _request_key(read_only):
+    """Attribute on `g` holding the request's read-only or read-write connection."""
+    return "_db_reader_connection" if read_only else "_db_connection"
+
+
+def get_request_connection(read_only=False):
+    """
+    Return the connection held by the current Flask request, checking one out
+    of the pool on first use. The connection opens a read transaction so all
+    reads in the request see one consistent snapshot.
+    :param read_only: Use the request's read-only connection.
+    """
+    key = _request_key(read_only)
+    connection = g.get(key)
+    if connection is None:
+        pool = get_current_pool(read_only)
+        connection = pool.acquire()
+        _begin_snapshot(connection, key)
+        setattr(g, key, connection)
+        setattr(g, f"{key}_pool", pool)
+    return connection
+
+
+def _begin_snapshot(connection, key):
+    """
+    Open a read transaction, remembering the query cache generation it
+    started at so reads from an older snapshot are never cached.
+    """
+    setattr(g, f"{key}_generation", query_cache.generation)
+    connection.execute("BEGIN")
+
+
+def request_snapshot_generation(read_only=False):
+    """Query cache generation at which the request's snapshot began."""
+    return g.get(f"{_request_key(read_only)}_generation", -1)
+
+
+def refresh_request_snapshot():
+    """
+    Move the request's connections to a new snapshot so reads issued after
+    a write in the same request see that write.
+    """
+    for read_only in (False, True):
+        key = _request_key(read_only)
+        connection = g.get(key)
+        if connection is not None:
+            if connection.in_transaction:
+                connection.commit()
+            _begin_snapshot(connection, key)
+
+
+def release_request_connection(exception=None):
+    """
+    Return the request's connections to their pools (registered as teardown handler).
+    """
+    for read_only in (False, True):
+        key = _request_key(read_only)
+        connection = g.pop(key, None)
+        if connection is not None:
+            g.pop(f"{key}_pool").release(connection)
+
+
+def is_read_only_request():
+    """True while handling a GET or HEAD request, which never write."""
+    return has_request_context() and request.method in ("GET", "HEAD")
+
+
+def init_app(app):
+    """
+    Register request-scoped connection handling on a Flask app.
+    """
+    app.teardown_appcontext(release_request_connection)
 
 
 class DatabaseHandler:
@@ -7,77 +340,249 @@ class DatabaseHandler:
     Handles low-level database operations with context management.
     """
 
-    def __init__(self):
+    def __init__(self, read_only=None):
         """
-        Initialize the database connection and cursor.
+        Check out a pooled connection and create a cursor. Inside a Flask
+        request the request's shared connection is reused.
+        :param read_only: Use a read-only connection. Defaults to read-only
+            for GET/HEAD requests and read-write everywhere else.
         """
-        self.connection = sqlite3.connect(DB_FILE)
-        self.connection.row_factory = sqlite3.Row  # Return results as dictionaries
+        self.read_only = is_read_only_request() if read_only is None else read_only
+        self.tenant = current_tenant()
+        self._request_scoped = has_app_context()
+        if self._request_scoped:
+            self.connection = get_request_connection(self.read_only)
+            self._pool = g.get(f"{_request_key(self.read_only)}_pool")
+        else:
+            self._pool = get_current_pool(self.read_only)
+            self.connection = self._pool.acquire()
         self.cursor = self.connection.cursor()
-        self.connection.execute("PRAGMA journal_mode=WAL;")  # Enable Write-Ahead Logging (WAL) mode
 
     def execute_query(self, query, params=None):
         """
-        Executes a query with optional parameters.
+        Executes a query with optional parameters and commits it.
+        Writes go through the single writer thread (group commit) unless
+        DB_WRITE_QUEUE is disabled.
         :param query: SQL query to execute.
         :param params: Optional parameters for parameterized queries.
+        :return: The statement's lastrowid.
         """
         try:
-            if params:
-                self.cursor.execute(query, params)
+            if DB_WRITE_QUEUE and not self.read_only:
+                lastrowid = wait_for_write(get_writer().submit(query, params, database=self._shard_database()))
             else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            print(f"Query executed successfully: {query} | Params: {params}")
+                lastrowid = self._execute_direct(query, params)
+            self._invalidate_cache(query)
+            if self._request_scoped:
+                refresh_request_snapshot()  # Later reads in this request see the write
+            logger.debug("Query executed successfully: %s | Params: %s", query, params)
+            return lastrowid
         except sqlite3.Error as e:
-            print(f"Database error during query execution: {e} | Query: {query} | Params: {params}")
+            logger.error("Database error during query execution: %s | Query: %s | Params: %s", e, query, params)
             raise e
 
-    def fetch_all(self, query, params=None):
+    def execute_many(self, query, seq_of_params):
+        """
+        Executes one statement for every parameter set in a single transaction.
+        :param query: SQL query to execute.
+        :param seq_of_params: Iterable of parameter sequences.
+        :return: Total number of rows affected.
+        """
+        try:
+            if DB_WRITE_QUEUE and not self.read_only:
+                rowcount = wait_for_write(
+                    get_writer().submit_many(query, seq_of_params, database=self._shard_database())
+                )
+            else:
+                if self.connection.in_transaction:
+                    self.connection.commit()
+                started = time.perf_counter()
+                self.cursor.executemany(query, seq_of_params)
+                self.connection.commit()
+                rowcount = self.cursor.rowcount
+                record_query(query, None, (time.perf_counter() - started) * 1000, max(rowcount, 0))
+            self._invalidate_cache(query)
+            if self._request_scoped:
+                refresh_request_snapshot()
+            logger.debug("Batch executed successfully: %s | Rows: %s", query, rowcount)
+            return rowcount
+        except sqlite3.Error as e:
+            logger.error("Database error during batch execution: %s | Query: %s", e, query)
+            raise e
+
+    def _execute_direct(self, query, params=None):
+        """
+        Execute and commit a write on this handler's own connection.
+        :return: The statement's lastrowid.
+        """
+        if self.connection.in_transaction:
+            self.connection.commit()  # Leave the read snapshot so the write sees the latest data
+        started = time.perf_counter()
+        if params:
+            self.cursor.execute(query, params)
+        else:
+            self.cursor.execute(query)
+        self.connection.commit()
+        record_query(query, params, (time.perf_counter() - started) * 1000, max(self.cursor.rowcount, 0))
+        return self.cursor.lastrowid
+
+    def _shard_database(self):
+        """The user's shard file for the writer thread, or None for the shared database."""
+        return self._pool.database if self._pool.shard else None
+
+    def _invalidate_cache(self, query):
+        """Drop cached reads of the tables a write touched (and their trigger targets)."""
+        if query_cache.enabled:
+            query_cache.invalidate_statement(query, self.connection, scope=self.tenant)
+
+    def _cached(self, kind, query, params, fetch):
+        """
+        Serve a read from the query cache, running `fetch` on a miss.
+        Rows are copied on the way in and out so callers may modify them.
+        """
+        key = query_cache.make_key(kind, query, params, scope=self.tenant)
+        if key is None:
+            return fetch()
+        rows = query_cache.get(key)
+        if rows is not None:
+            return [dict(row) for row in rows] if kind == "all" else (dict(rows[0]) if rows else None)
+        if self._request_scoped:
+            generation = request_snapshot_generation(self.read_only)
+        else:
+            generation = query_cache.generation
+        result = fetch()
+        if kind == "all":
+            stored = tuple(dict(row) for row in result)
+        else:
+            stored = (dict(result),) if result else ()
+        query_cache.put(key, query, stored, generation, self.connection)
+        return result
+
+    def fetch_all(self, query, params=None, cache=False):
         """
         Fetch all rows for a query.
         :param query: SQL query to execute.
         :param params: Optional parameters for parameterized queries.
+        :param cache: Serve repeated reads from the query result cache until
+            a write touches one of the tables the query reads.
         :return: List of all rows fetched as dictionaries.
         """
+        if cache and query_cache.enabled:
+            return self._cached("all", query, params, lambda: self.fetch_all(query, params))
         try:
             if not isinstance(params, (list, tuple)) and params is not None:
                 params = [params]  # Convert single parameter to list
+            started = time.perf_counter()
             if params:
                 self.cursor.execute(query, params)
             else:
                 self.cursor.execute(query)
             results = self.cursor.fetchall()
+            record_query(query, params, (time.perf_counter() - started) * 1000, len(results))
             return [dict(row) for row in results] if results else []
         except sqlite3.Error as e:
-            print(f"Database error: {e} | Query: {query} | Params: {params}")
+            logger.error("Database error: %s | Query: %s | Params: %s", e, query, params)
             raise e
 
-    def fetch_one(self, query, params=None):
+    def fetch_columns(self, query, params=None):
+        """
+        Fetch a result set column by column, ready to load into arrays.
+        Rows come back as plain tuples, skipping the per-row dictionaries
+        fetch_all builds, which dominate the cost of large reads.
+        :param query: SQL query to execute.
+        :param params: Optional parameters for parameterized queries.
+        :return: Dictionary of column name to a tuple of its values.
+        """
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        try:
+            started = time.perf_counter()
+            cursor.execute(query, params or ())
+            rows = cursor.fetchall()
+            record_query(query, params, (time.perf_counter() - started) * 1000, len(rows))
+            columns = [description[0] for description in cursor.description]
+            values = list(zip(*rows)) if rows else [() for _ in columns]
+            return dict(zip(columns, values))
+        except sqlite3.Error as e:
+            logger.error("Database error: %s | Query: %s | Params: %s", e, query, params)
+            raise e
+        finally:
+            cursor.close()
+
+    def fetch_batches(self, query, params=None, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Stream a result set in batches instead of loading it whole.
+        Rows are plain tuples fetched `batch_size` at a time, so memory stays
+        flat however many rows match. The query runs right away; keep the
+        handler open until the batches have been consumed.
+        :param query: SQL query to execute.
+        :param params: Optional parameters for parameterized queries.
+        :param batch_size: Rows per batch.
+        :return: Tuple of (column names, generator of lists of row tuples).
+        """
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        try:
+            started = time.perf_counter()
+            cursor.execute(query, params or ())
+            elapsed = time.perf_counter() - started
+        except sqlite3.Error as e:
+            cursor.close()
+            logger.error("Database error: %s | Query: %s | Params: %s", e, query, params)
+            raise e
+        columns = [description[0] for description in cursor.description]
+        return columns, self._batches(cursor, query, params, batch_size, elapsed)
+
+    @staticmethod
+    def _batches(cursor, query, params, batch_size, elapsed):
+        """Yield a cursor's rows in batches; records the time spent in SQLite once exhausted or closed."""
+        rows = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                batch = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - started
+                if not batch:
+                    break
+                rows += len(batch)
+                yield batch
+        finally:
+            cursor.close()
+            record_query(query, params, elapsed * 1000, rows)
+
+    def fetch_one(self, query, params=None, cache=False):
         """
         Fetch a single row for a query.
         :param query: SQL query to execute.
         :param params: Optional parameters for parameterized queries.
+        :param cache: Serve repeated reads from the query result cache (see fetch_all).
         :return: Single row fetched as a dictionary.
         """
+        if cache and query_cache.enabled:
+            return self._cached("one", query, params, lambda: self.fetch_one(query, params))
         try:
+            started = time.perf_counter()
             if params:
                 self.cursor.execute(query, params)
             else:
                 self.cursor.execute(query)
             result = self.cursor.fetchone()
-            print(f"Fetch one successful: {query} | Params: {params}")
+            record_query(query, params, (time.perf_counter() - started) * 1000, 1 if result else 0)
+            logger.debug("Fetch one successful: %s | Params: %s", query, params)
             return dict(result) if result else None
         except sqlite3.Error as e:
-            print(f"Database fetch error: {e} | Query: {query} | Params: {params}")
+            logger.error("Database fetch error: %s | Query: %s | Params: %s", e, query, params)
             raise e
 
     def close(self):
         """
-        Close the database connection.
+        Release the database connection. Pooled connections go back to the
+        pool; the request's shared connection stays open until teardown.
         """
-        self.connection.close()
-        print("Database connection closed.")
+        self.cursor.close()
+        if not self._request_scoped:
+            self._pool.release(self.connection)
+        logger.debug("Database connection released.")
 
     def __enter__(self):
         """
@@ -89,13 +594,13 @@ class DatabaseHandler:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
         Context management exit.
-        Automatically closes the database connection.
+        Automatically releases the database connection.
         """
         self.close()
 
     def get_exercise_details(self, exercise_name):
         query = """
-        SELECT 
+        SELECT
             primary_muscle_group,
             secondary_muscle_group,
             tertiary_muscle_group,
@@ -104,59 +609,6 @@ class DatabaseHandler:
             grips,
             stabilizers,
             synergists
-        FROM exercises 
+        FROM exercises
         WHERE exercise_name = ?
         """
-
-def initialize_database():
-    """Initialize the database with necessary tables."""
-    schema_queries = [
-        # Drop existing tables
-        "DROP TABLE IF EXISTS user_selection;",
-        "DROP TABLE IF EXISTS workout_log;",
-        "DROP TABLE IF EXISTS exercises;",
-        
-        # Create exercises table
-        """
-        CREATE TABLE exercises (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            exercise_name TEXT UNIQUE NOT NULL,
-            primary_muscle_group TEXT,
-            secondary_muscle_group TEXT,
-            tertiary_muscle_group TEXT,
-            advanced_isolated_muscles TEXT,
-            utility TEXT,
-            grips TEXT,
-            stabilizers TEXT,
-            synergists TEXT,
-            force TEXT,
-            equipment TEXT,
-            mechanic TEXT,
-            difficulty TEXT
-        );
-        """,
-        
-        # Create user_selection table without UNIQUE constraint
-        """
-        CREATE TABLE user_selection (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            routine TEXT NOT NULL,
-            exercise TEXT NOT NULL,
-            sets INTEGER NOT NULL,
-            min_rep_range INTEGER NOT NULL,
-            max_rep_range INTEGER NOT NULL,
-            rir INTEGER DEFAULT 0,
-            weight REAL NOT NULL,
-            FOREIGN KEY (exercise) REFERENCES exercises(exercise_name)
-        );
-        """
-    ]
-
-    with DatabaseHandler() as db_handler:
-        for query in schema_queries:
-            try:
-                db_handler.execute_query(query)
-                print(f"Schema created: {query}")
-            except sqlite3.Error as e:
-                print(f"Error creating schema: {e}")
-                raise e
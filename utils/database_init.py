@@ -1,29 +0,0 @@
-from .database import DatabaseHandler
-
-def initialize_workout_log_table():
-    """Create the workout_log table if it doesn't exist."""
-    query = """
-    CREATE TABLE IF NOT EXISTS workout_log (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        workout_plan_id INTEGER,
-        routine TEXT NOT NULL,
-        exercise TEXT NOT NULL,
-        planned_sets INTEGER,
-        planned_min_reps INTEGER,
-        planned_max_reps INTEGER,
-        planned_rir INTEGER,
-        planned_weight REAL,
-        scored_weight REAL,
-        scored_min_reps INTEGER,
-        scored_max_reps INTEGER,
-        last_progression_date TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (workout_plan_id) REFERENCES user_selection(id)
-    );
-    """
-    try:
-        with DatabaseHandler() as db:
-            db.execute_query(query)
-            print("Workout log table initialized successfully")
-    except Exception as e:
-        print(f"Error initializing workout log table: {e}") 
\ No newline at end of file
@@ -0,0 +1,330 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from utils.config import (
+    DB_FILE, DB_BUSY_TIMEOUT, DB_WRITE_BATCH_SIZE, DB_WRITE_RETRIES, DB_WRITE_BACKOFF, DB_WRITE_TIMEOUT,
+    TENANT_SHARD_CACHE_SIZE,
+)
+from utils.query_cache import written_tables
+from utils.query_stats import record_query
+from utils.tenancy import attach_catalog
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Table name -> functions run by the writer after a batch wrote that table (see register_write_hook)
+_write_hooks = {}
+
+
+def register_write_hook(table, hook):
+    """
+    Run `hook(connection)` on the writer thread whenever a batch wrote `table`,
+    inside the batch's transaction and before it commits, so the hook's
+    writes land atomically with the batch. A failing hook is rolled back
+    and logged without failing the batch.
+    :param table: Table name, e.g. "workout_log".
+    :param hook: Callable taking the writer's connection (tuple rows, transaction open).
+    """
+    _write_hooks.setdefault(table.lower(), []).append(hook)
+
+
+class WriteRequest:
+    """A queued write: one statement, or one statement run over many parameter sets."""
+
+    __slots__ = ("query", "params", "many", "database", "future")
+
+    def __init__(self, query, params=None, many=False, database=None):
+        self.query = query
+        self.params = params
+        self.many = many
+        self.database = database
+        self.future = Future()
+
+
+def _is_busy(error):
+    """True for lock contention errors that are worth retrying."""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class DatabaseWriter:
+    """
+    Single writer thread with group commit.
+
+    Writers enqueue requests and receive futures. The writer thread drains
+    whatever is queued (up to `batch_size`), applies it in one IMMEDIATE
+    transaction with a savepoint per request, and commits once. A failing
+    statement only rolls back its own savepoint; its future receives the
+    error while the rest of the batch commits. Lock contention from other
+    processes is retried with exponential backoff. Any other failure fails
+    only the requests it hit; the thread keeps serving the queue.
+
+    Requests may target a user shard instead of the main database. A batch
+    is committed once per database it touches; shard connections are kept
+    in an LRU of at most `max_shards`.
+    """
+
+    _STOP = object()
+
+    def __init__(self, database=DB_FILE, batch_size=DB_WRITE_BATCH_SIZE,
+                 retries=DB_WRITE_RETRIES, backoff=DB_WRITE_BACKOFF, max_shards=TENANT_SHARD_CACHE_SIZE):
+        """
+        :param database: Path to the SQLite database file.
+        :param batch_size: Maximum requests committed together.
+        :param retries: Attempts after the first when the database is locked.
+        :param backoff: Initial retry delay in seconds, doubled per attempt.
+        :param max_shards: Shard connections kept open by the writer thread.
+        """
+        self.database = database
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.max_shards = max(1, max_shards)
+        self._shards = OrderedDict()  # Only touched by the writer thread
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, query, params=None, database=None):
+        """
+        Queue a write.
+        :param query: SQL statement.
+        :param params: Optional parameters for the statement.
+        :param database: User shard file to write to; None for the main database.
+        :return: Future resolving to the statement's lastrowid, or raising its error.
+        """
+        request = WriteRequest(query, params, database=database)
+        self._queue.put(request)
+        return request.future
+
+    def submit_many(self, query, seq_of_params, database=None):
+        """
+        Queue one statement executed for every parameter set, applied atomically.
+        :param database: User shard file to write to; None for the main database.
+        :return: Future resolving to the total rowcount.
+        """
+        request = WriteRequest(query, list(seq_of_params), many=True, database=database)
+        self._queue.put(request)
+        return request.future
+
+    def is_alive(self):
+        """True while the writer thread is running."""
+        return self._thread.is_alive()
+
+    def stop(self):
+        """Finish queued writes and stop the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.database, timeout=DB_BUSY_TIMEOUT, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL;")
+        return connection
+
+    def _shard_connection(self, database):
+        """Writer connection to a user shard, opening it (and evicting the LRU one) if needed."""
+        connection = self._shards.get(database)
+        if connection is not None:
+            self._shards.move_to_end(database)
+            return connection
+        uri = Path(database).resolve().as_uri()
+        connection = sqlite3.connect(uri, uri=True, timeout=DB_BUSY_TIMEOUT, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL;")
+        attach_catalog(connection)  # Writes may read the catalog, e.g. INSERT ... SELECT
+        self._shards[database] = connection
+        while len(self._shards) > self.max_shards:
+            self._shards.popitem(last=False)[1].close()
+        return connection
+
+    def _commit_by_database(self, connection, batch):
+        """Commit a batch once per target database, in first-seen order."""
+        groups = OrderedDict()
+        for request in batch:
+            groups.setdefault(request.database, []).append(request)
+        for database, requests in groups.items():
+            if database is None:
+                self._commit_batch(connection, requests)
+                continue
+            try:
+                shard = self._shard_connection(database)
+            except Exception as e:
+                logger.error("Cannot open shard %s: %s", database, e)
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            self._commit_batch(shard, requests)
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while True:
+                request = self._queue.get()
+                if request is self._STOP:
+                    return
+                batch = [request]
+                stop = False
+                while len(batch) < self.batch_size:
+                    try:
+                        request = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is self._STOP:
+                        stop = True
+                        break
+                    batch.append(request)
+                batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+                if batch:
+                    try:
+                        self._commit_by_database(connection, batch)
+                    except Exception as e:
+                        logger.exception("Writer failed on a batch of %d writes", len(batch))
+                        _fail_pending(batch, e)
+                if stop:
+                    return
+        finally:
+            connection.close()
+            for shard in self._shards.values():
+                shard.close()
+
+    def _commit_batch(self, connection, batch):
+        """Apply a batch in one transaction, retrying the whole batch on lock contention."""
+        for attempt in range(self.retries + 1):
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                outcomes = [self._apply(connection, request) for request in batch]
+                self._run_hooks(connection, batch, outcomes)
+                connection.execute("COMMIT")
+            except sqlite3.OperationalError as e:
+                _rollback(connection)
+                if _is_busy(e) and attempt < self.retries:
+                    delay = self.backoff * (2 ** attempt)
+                    logger.warning("Database busy, retrying %d writes in %.3fs: %s", len(batch), delay, e)
+                    time.sleep(delay)
+                    continue
+                logger.error("Group commit of %d writes failed: %s", len(batch), e)
+                _fail_pending(batch, e)
+                return
+            except Exception as e:
+                _rollback(connection)
+                logger.error("Group commit of %d writes failed: %s", len(batch), e)
+                _fail_pending(batch, e)
+                return
+            for request, (result, error) in zip(batch, outcomes):
+                if error is None:
+                    request.future.set_result(result)
+                else:
+                    request.future.set_exception(error)
+            logger.debug("Group commit applied %d writes", len(batch))
+            return
+
+    def _run_hooks(self, connection, batch, outcomes):
+        """Run the write hooks of every table the batch's successful requests wrote."""
+        tables = set()
+        for request, (_, error) in zip(batch, outcomes):
+            if error is None:
+                tables |= written_tables(request.query)
+        for table in sorted(tables):
+            for hook in _write_hooks.get(table, ()):
+                connection.execute("SAVEPOINT write_hook")
+                try:
+                    hook(connection)
+                except Exception as e:
+                    connection.execute("ROLLBACK TO write_hook")
+                    connection.execute("RELEASE write_hook")
+                    if isinstance(e, sqlite3.OperationalError) and _is_busy(e):
+                        raise  # Retry the whole batch
+                    logger.error("Write hook %s for %s failed: %s", getattr(hook, "__name__", hook), table, e)
+                    continue
+                connection.execute("RELEASE write_hook")
+
+    def _apply(self, connection, request):
+        """
+        Run one request inside its own savepoint.
+        :return: (result, error) pair; the error is set when only this request failed.
+        """
+        connection.execute("SAVEPOINT write_request")
+        started = time.perf_counter()
+        try:
+            if request.many:
+                cursor = connection.executemany(request.query, request.params)
+                result = cursor.rowcount
+            elif request.params:
+                cursor = connection.execute(request.query, request.params)
+                result = cursor.lastrowid
+            else:
+                cursor = connection.execute(request.query)
+                result = cursor.lastrowid
+        except sqlite3.OperationalError as e:
+            connection.execute("ROLLBACK TO write_request")
+            connection.execute("RELEASE write_request")
+            if _is_busy(e):
+                raise  # Retry the whole batch
+            return None, e
+        except Exception as e:  # e.g. OverflowError for an out-of-range integer parameter
+            connection.execute("ROLLBACK TO write_request")
+            connection.execute("RELEASE write_request")
+            return None, e
+        connection.execute("RELEASE write_request")
+        record_query(request.query, request.params, (time.perf_counter() - started) * 1000, max(cursor.rowcount, 0))
+        return result, None
+
+
+def _rollback(connection):
+    """Roll back an open transaction, if any, ignoring a connection that cannot."""
+    try:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+    except sqlite3.Error as e:
+        logger.error("Rollback failed: %s", e)
+
+
+def _fail_pending(requests, error):
+    """Fail every request whose future is still unresolved."""
+    for request in requests:
+        if not request.future.done():
+            request.future.set_exception(error)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """
+    Return the process-wide writer, starting its thread on first use (or
+    again if it ever stopped).
+    """
+    global _writer
+    if _writer is None or not _writer.is_alive():
+        with _writer_lock:
+            if _writer is None or not _writer.is_alive():
+                if _writer is not None:
+                    logger.error("Database writer thread stopped; starting a new one")
+                _writer = DatabaseWriter()
+    return _writer
+
+
+def wait_for_write(future, timeout=DB_WRITE_TIMEOUT):
+    """
+    Wait for a queued write's result.
+    :raises sqlite3.OperationalError: When the writer does not answer within `timeout` seconds.
+    """
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise sqlite3.OperationalError(f"Timed out after {timeout}s waiting for the database writer") from None
+
+
+def _stop_writer():
+    """Drain queued writes on interpreter shutdown."""
+    if _writer is not None:
+        _writer.stop()
+
+
+atexit.register(_stop_writer)
@@ -0,0 +1,89 @@
+import tempfile
+import xlsxwriter
+from utils.config import EXPORT_SPOOL_SIZE, EXPORT_CHUNK_SIZE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rows per worksheet in the XLSX format; longer sheets continue on "<name> (2)", ...
+XLSX_MAX_ROWS = 1048576
+
+
+def dict_rows(rows):
+    """
+    (columns, batches) for an already loaded list of dictionaries, the
+    shape summary helpers return, so it can be written like a cursor.
+    """
+    if not rows:
+        return [], iter(())
+    return list(rows[0]), iter([[tuple(row.values()) for row in rows]])
+
+
+def _write_sheet(workbook, name, columns, batches, header_format):
+    """
+    Write one sheet row by row. Sheets without rows are left out, as
+    before; rows past the format's limit continue on a new sheet.
+    :return: Rows written.
+    """
+    written = 0
+    worksheet = None
+    row_number = XLSX_MAX_ROWS
+    for batch in batches:
+        for row in batch:
+            if row_number == XLSX_MAX_ROWS:
+                part = written // (XLSX_MAX_ROWS - 1) + 1
+                worksheet = workbook.add_worksheet(name if part == 1 else f"{name} ({part})")
+                worksheet.write_row(0, 0, columns, header_format)
+                row_number = 1
+            worksheet.write_row(row_number, 0, row)
+            row_number += 1
+            written += 1
+    return written
+
+
+def write_workbook(sheets):
+    """
+    Write sheets into an XLSX file without holding their rows in memory.
+
+    The workbook uses XlsxWriter's constant_memory mode, which flushes
+    every row as soon as the next one starts, and goes into a spooled
+    temporary file that only stays in memory while small. Memory therefore
+    stays flat however many rows the sheets have.
+
+    :param sheets: Mapping of sheet name to (columns, batches of row
+        tuples), e.g. from DatabaseHandler.fetch_batches or dict_rows.
+    :return: Tuple of (file positioned at its start, size in bytes).
+        The caller closes the file, e.g. through stream_file.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    try:
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        for name, (columns, batches) in sheets.items():
+            rows = _write_sheet(workbook, name, columns, batches, header_format)
+            logger.debug("Wrote %d rows to sheet '%s'", rows, name)
+        workbook.close()
+        size = output.seek(0, 2)
+        output.seek(0)
+        return output, size
+    except Exception:
+        output.close()
+        raise
+
+
+def stream_file(file, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield a file's contents in chunks, closing it once sent (or when the
+    client disconnects and the generator is closed).
+    """
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
@@ -1,5 +1,26 @@
 from utils.database import DatabaseHandler
+from utils.catalog import get_catalog
+from utils.migrations import FILTER_COLUMNS, SEARCH_COLUMNS
+import re
 import sqlite3
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# bm25 column weights for search_exercises; name hits outrank muscle and equipment hits
+SEARCH_WEIGHTS = {
+    "exercise_name": 10.0,
+    "primary_muscle_group": 4.0,
+    "secondary_muscle_group": 2.0,
+    "tertiary_muscle_group": 1.0,
+    "advanced_isolated_muscles": 3.0,
+    "stabilizers": 1.0,
+    "synergists": 1.0,
+    "equipment": 2.0,
+}
+
+# Upper bound on search results per request
+SEARCH_MAX_LIMIT = 50
 
 class ExerciseManager:
     """
@@ -9,40 +30,67 @@ class ExerciseManager:
     @staticmethod
     def get_exercises(filters=None):
         """
-        Fetch exercises from the database, optionally filtered.
+        Fetch exercises from the catalog, optionally filtered through its bitset index.
+        Primary muscle group and advanced isolated muscles match substrings;
+        other columns match whole values, ignoring case and surrounding whitespace.
         :param filters: Dictionary containing filter criteria.
         :return: List of exercise names.
         """
-        base_query = """
-        SELECT exercise_name 
-        FROM exercises 
-        WHERE exercise_name IS NOT NULL
-        """
-        
-        params = []
-        if filters:
-            conditions = []
-            for field, value in filters.items():
-                if field in ["primary_muscle_group", "advanced_isolated_muscles"]:
-                    conditions.append(f"{field} LIKE ?")
-                    params.append(f"%{value}%")
-                else:
-                    conditions.append(f"LOWER({field}) = LOWER(?)")
-                    params.append(value)
-            
-            if conditions:
-                base_query += " AND " + " AND ".join(conditions)
-
-        base_query += " ORDER BY exercise_name ASC"
-        print(f"DEBUG: Final query: {base_query} with params: {params}")
+        try:
+            catalog = get_catalog()
+            if not filters:
+                return catalog.exercise_names()
+            exercise_names = catalog.filter_exercises(filters)
+            logger.debug("Filters %s matched %d exercises", filters, len(exercise_names))
+            return exercise_names
+        except Exception as e:
+            logger.error("Error fetching exercises: %s", e)
+            return []
 
-        with DatabaseHandler() as db:
+    @staticmethod
+    def search_exercises(query, limit=10):
+        """
+        Ranked prefix search over exercise names, muscle groups and equipment.
+        Every word of the query must match the start of a word in one of the
+        searched columns, so "dumb incl" finds "Dumbbell Incline ..." exercises.
+        :param query: Free-text search as typed by the user.
+        :param limit: Maximum number of names to return.
+        :return: Exercise names, best match first.
+        """
+        tokens = re.findall(r"\w+", (query or "").lower())
+        if not tokens:
+            return []
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        # Quote each token so FTS5 operators typed by the user are matched literally
+        match = " ".join(f'"{token}"*' for token in tokens)
+        rank = f"bm25({', '.join(str(SEARCH_WEIGHTS[column]) for column in SEARCH_COLUMNS)})"
+        search_query = f"""
+        SELECT e.exercise_name, MIN(hits.score) AS score
+        FROM (
+            SELECT rowid, rank AS score
+            FROM exercises_fts
+            WHERE exercises_fts MATCH ? AND rank MATCH ?
+        ) AS hits
+        JOIN exercises e ON e.id = hits.rowid
+        GROUP BY e.exercise_name
+        ORDER BY score, e.exercise_name
+        LIMIT ?
+        """
+        with DatabaseHandler(read_only=True) as db:
             try:
-                results = db.fetch_all(base_query, params if params else None)
-                return [row["exercise_name"] for row in results if row["exercise_name"]]
-            except Exception as e:
-                print(f"Error fetching exercises: {e}")
-                return []
+                results = db.fetch_all(search_query, (match, rank, limit))
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):
+                    raise
+                # SQLite without FTS5: substring match on the name only
+                logger.debug("exercises_fts unavailable, falling back to LIKE search")
+                conditions = " AND ".join("exercise_name LIKE ?" for _ in tokens)
+                results = db.fetch_all(
+                    f"SELECT DISTINCT exercise_name FROM exercises WHERE {conditions} "
+                    "ORDER BY exercise_name LIMIT ?",
+                    [f"%{token}%" for token in tokens] + [limit],
+                )
+        return [row["exercise_name"] for row in results]
 
     @staticmethod
     def add_exercise(routine, exercise, sets, min_rep_range, max_rep_range, rir, weight):
@@ -51,7 +99,7 @@ class ExerciseManager:
         Ensures duplicate entries are not allowed.
         """
         if not all([routine, exercise, sets, min_rep_range, max_rep_range, weight]):
-            print("Error: Missing required fields for adding an exercise.")
+            logger.warning("Missing required fields for adding an exercise.")
             return "Error: Missing required fields."
 
         duplicate_check_query = """
@@ -73,17 +121,17 @@ class ExerciseManager:
                 existing_count = db.fetch_one(duplicate_check_query, params)
                 
                 if existing_count and existing_count["count"] > 0:
-                    print(f"Duplicate exercise found: {routine}, {exercise}")
+                    logger.info("Duplicate exercise found: %s, %s", routine, exercise)
                     return "Exercise already exists in this routine."
 
                 # Insert new exercise
                 insert_params = (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight)
                 db.execute_query(insert_query, insert_params)
-                print(f"DEBUG: Exercise added - {exercise} in routine {routine}")
+                logger.debug("Exercise added - %s in routine %s", exercise, routine)
                 return "Exercise added successfully."
 
         except Exception as e:
-            print(f"Database error in add_exercise: {e}")
+            logger.error("Database error in add_exercise: %s", e)
             return f"Database error: {e}"
 
     @staticmethod
@@ -95,23 +143,26 @@ class ExerciseManager:
         with DatabaseHandler() as db:
             try:
                 db.execute_query(query, (exercise_id,))
-                print(f"DEBUG: Exercise with ID {exercise_id} deleted.")
+                logger.debug("Exercise with ID %s deleted.", exercise_id)
             except sqlite3.Error as e:
-                print(f"Error deleting exercise: {e}")
+                logger.error("Error deleting exercise: %s", e)
 
     @staticmethod
     def fetch_unique_values(table, column):
         """
         Fetch unique values from a specific column in a table.
         """
+        if table == "exercises" and column in FILTER_COLUMNS:
+            return get_catalog().distinct_values(column)
+
         query = f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column} ASC"
-        with DatabaseHandler() as db:
+        with DatabaseHandler(read_only=True) as db:
             try:
                 results = db.fetch_all(query)
-                print(f"DEBUG: Unique values fetched for {column} in {table}")
+                logger.debug("Unique values fetched for %s in %s", column, table)
                 return [row[column] for row in results]
             except Exception as e:
-                print(f"Error fetching unique values: {e}")
+                logger.error("Error fetching unique values: %s", e)
                 return []
 
     @staticmethod
@@ -128,11 +179,12 @@ class ExerciseManager:
         if query_conditions:
             base_query += " AND " + " AND ".join(query_conditions)
         base_query += " ORDER BY exercise_name ASC"
-        print(f"DEBUG: Built query - {base_query} with params {params}")
+        logger.debug("Built query - %s with params %s", base_query, params)
         return base_query, params
 
 # Publicly expose key functions
 get_exercises = ExerciseManager.get_exercises
+search_exercises = ExerciseManager.search_exercises
 add_exercise = ExerciseManager.add_exercise
 delete_exercise = ExerciseManager.delete_exercise
 fetch_unique_values = ExerciseManager.fetch_unique_values
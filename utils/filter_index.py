@@ -0,0 +1,145 @@
+from itertools import compress
+
+
+# Columns matched by substring (the old `LIKE '%value%'` filters); all others match whole values
+SUBSTRING_COLUMNS = frozenset({"primary_muscle_group", "advanced_isolated_muscles"})
+
+# Bound on cached substring lookups per index (needles come from clients)
+SUBSTRING_CACHE_SIZE = 1024
+
+# Maps the characters of bin() output to selector bytes for itertools.compress
+_BIT_SELECTORS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def normalize(value):
+    """Normalize a filter or catalog value for matching: trimmed and case-insensitive."""
+    return str(value).strip().lower()
+
+
+class FilterIndex:
+    """
+    Inverted index over catalog columns.
+
+    Every (column, normalized value) maps to a bitset of row ordinals held
+    in a Python int, so a filter request is a handful of big-int ANDs. Row
+    ordinals follow the catalog's name order, so matching names come out
+    already sorted.
+    """
+
+    def __init__(self, rows, columns, substring_columns=SUBSTRING_COLUMNS):
+        """
+        :param rows: Catalog rows sorted by exercise_name.
+        :param columns: Columns to index.
+        :param substring_columns: Columns whose filters match substrings.
+        """
+        self._names = tuple(row["exercise_name"] for row in rows)
+        self.all_rows = (1 << len(self._names)) - 1
+        # Rows repeating the previous row's name; counted only when that row is not also selected
+        self._repeated_rows = sum(
+            1 << ordinal for ordinal in range(1, len(self._names))
+            if self._names[ordinal] == self._names[ordinal - 1]
+        )
+        self.substring_columns = frozenset(substring_columns)
+        self._postings = {column: {} for column in columns}
+        for ordinal, row in enumerate(rows):
+            bit = 1 << ordinal
+            for column, postings in self._postings.items():
+                value = row[column]
+                if value:
+                    key = normalize(value)
+                    postings[key] = postings.get(key, 0) | bit
+        self._substring_cache = {}
+
+    def postings(self, column):
+        """
+        :return: Mapping of normalized value to row bitset for one column.
+        """
+        return self._postings[column]
+
+    def match(self, column, value):
+        """
+        Bitset of rows whose `column` matches `value`.
+        :param column: Indexed column.
+        :param value: Filter value as sent by the client.
+        """
+        postings = self._postings.get(column)
+        if postings is None:
+            return 0
+        needle = normalize(value)
+        if column not in self.substring_columns:
+            return postings.get(needle, 0)
+        key = (column, needle)
+        bits = self._substring_cache.get(key)
+        if bits is None:
+            bits = 0
+            for candidate, candidate_bits in postings.items():
+                if needle in candidate:
+                    bits |= candidate_bits
+            if len(self._substring_cache) >= SUBSTRING_CACHE_SIZE:
+                self._substring_cache.clear()
+            self._substring_cache[key] = bits
+        return bits
+
+    def count(self, bits):
+        """
+        Number of distinct exercise names in a row bitset.
+        """
+        # A repeated row is a duplicate only when its predecessor (bit - 1) is selected too
+        return bits.bit_count() - (bits & self._repeated_rows & (bits << 1)).bit_count()
+
+    def select(self, filters):
+        """
+        Bitset of rows matching every filter.
+        :param filters: Mapping of column to filter value; empty values are ignored.
+        """
+        bits = self.all_rows
+        for column, value in filters.items():
+            if value:
+                bits &= self.match(column, value)
+                if not bits:
+                    break
+        return bits
+
+    def names(self, bits):
+        """
+        Exercise names for a row bitset, ascending and without duplicates.
+        """
+        if not bits:
+            return []
+        selectors = bin(bits)[:1:-1].encode().translate(_BIT_SELECTORS)  # Bit i -> selector i
+        return list(dict.fromkeys(compress(self._names, selectors)))
+
+    def filter(self, filters):
+        """
+        Exercise names matching every filter, in ascending order.
+        """
+        return self.names(self.select(filters))
+
+    def facets(self, filters, values):
+        """
+        Match counts for every candidate value of every column, each computed
+        against all filters except the column's own, so a count is the number
+        of exercises left if that value were chosen instead.
+        :param filters: Mapping of column to the currently selected value.
+        :param values: Mapping of column to the candidate values to count.
+        :return: Mapping of column to a list of (value, count) pairs.
+        """
+        active = [(column, self.match(column, value)) for column, value in filters.items() if value]
+        # Prefix/suffix ANDs give "all filters but one" for every column in one pass
+        prefix = [self.all_rows]
+        for _, bits in active:
+            prefix.append(prefix[-1] & bits)
+        suffix = [self.all_rows]
+        for _, bits in reversed(active):
+            suffix.append(suffix[-1] & bits)
+        suffix.reverse()
+        others = {column: prefix[i] & suffix[i + 1] for i, (column, _) in enumerate(active)}
+
+        facets = {}
+        for column, candidates in values.items():
+            base = others.get(column, prefix[-1])
+            facets[column] = [
+                (value, self.count(base & self.match(column, value)) if base else 0)
+                for value in candidates
+            ]
+        return facets
@@ -1,4 +1,7 @@
 from utils.database import DatabaseHandler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class ExerciseFilter:
@@ -37,11 +40,11 @@ class ExerciseFilter:
             base_query += " AND " + " AND ".join(query_conditions)
 
         try:
-            with DatabaseHandler() as db:
+            with DatabaseHandler(read_only=True) as db:
                 results = db.fetch_all(base_query, params)
-                print(f"DEBUG: Filter query executed: {base_query} with params {params}")
+                logger.debug("Filter query executed: %s with params %s", base_query, params)
                 return [row[0] for row in results if isinstance(row, tuple)]  # Extract exercise names from results
         except Exception as e:
-            print(f"Error filtering exercises with filters {filters}: {e}")
+            logger.error("Error filtering exercises with filters %s: %s", filters, e)
             return []
 
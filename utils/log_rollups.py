@@ -0,0 +1,238 @@
+import json
+import sqlite3
+from datetime import date
+from utils.database import DatabaseHandler, get_current_pool
+from utils.db_writer import register_write_hook
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+ROLLUP_GRAINS = ("day", "week")
+
+# Dimension name -> (rollup table, key column)
+ROLLUP_DIMENSIONS = {
+    "exercise": ("workout_log_rollup_exercise", "exercise"),
+    "muscle_group": ("workout_log_rollup_muscle", "muscle_group"),
+}
+
+# Most rows a range query returns
+MAX_ROLLUP_ROWS = 5000
+
+# One row per log entry: its day and its sets, reps and volume. Scored values
+# win over planned ones; reps count the top of the range like the weekly
+# summary. Muscle volume goes to the exercise's primary muscle group.
+_LOG_ENTRIES = """
+    SELECT
+        date(w.created_at) AS day,
+        w.exercise AS exercise,
+        e.primary_muscle_group AS muscle_group,
+        COALESCE(w.planned_sets, 0) AS sets,
+        COALESCE(w.planned_sets, 0) * COALESCE(w.scored_max_reps, w.planned_max_reps, 0) AS reps,
+        COALESCE(w.planned_sets, 0) * COALESCE(w.scored_max_reps, w.planned_max_reps, 0)
+            * COALESCE(w.scored_weight, w.planned_weight, 0) AS volume
+    FROM workout_log w
+    LEFT JOIN exercises e ON e.id = (SELECT MIN(id) FROM exercises WHERE exercise_name = w.exercise)
+    WHERE date(w.created_at) IS NOT NULL AND {where}
+"""
+
+
+def week_start(day):
+    """Monday of the week containing `day` (a date)."""
+    return date.fromordinal(day.toordinal() - day.weekday())
+
+
+def _aggregate_days(connection, table, key, where, params, accumulate):
+    """
+    Aggregate log entries matching `where` into daily rows of one rollup table.
+    :param accumulate: Add to existing rows instead of replacing them.
+    """
+    on_conflict = (
+        "entries = entries + excluded.entries, total_sets = total_sets + excluded.total_sets, "
+        "total_reps = total_reps + excluded.total_reps, total_volume = total_volume + excluded.total_volume"
+        if accumulate else
+        "entries = excluded.entries, total_sets = excluded.total_sets, "
+        "total_reps = excluded.total_reps, total_volume = excluded.total_volume"
+    )
+    connection.execute(
+        f"""
+        INSERT INTO {table} (grain, period_start, {key}, entries, total_sets, total_reps, total_volume)
+        SELECT 'day', day, {key}, COUNT(*), SUM(sets), SUM(reps), SUM(volume)
+        FROM ({_LOG_ENTRIES.format(where=where)})
+        WHERE {key} IS NOT NULL AND {key} <> ''
+        GROUP BY day, {key}
+        ORDER BY day, {key}
+        ON CONFLICT (grain, {key}, period_start) DO UPDATE SET {on_conflict}
+        """,
+        params,
+    )
+
+
+def _rebuild_weeks(connection, table, key, weeks):
+    """Recompute the weekly rows of `weeks` (JSON list of Mondays) from the daily rows."""
+    connection.execute(
+        f"DELETE FROM {table} WHERE grain = 'week' AND period_start IN (SELECT value FROM json_each(?))",
+        (weeks,),
+    )
+    connection.execute(
+        f"""
+        INSERT INTO {table} (grain, period_start, {key}, entries, total_sets, total_reps, total_volume)
+        SELECT 'week', w.value, d.{key}, SUM(d.entries), SUM(d.total_sets), SUM(d.total_reps), SUM(d.total_volume)
+        FROM json_each(?) AS w
+        JOIN {table} AS d
+            ON d.grain = 'day' AND d.period_start >= w.value AND d.period_start < date(w.value, '+7 days')
+        GROUP BY w.value, d.{key}
+        """,
+        (weeks,),
+    )
+
+
+def _refresh(connection, full=False):
+    """
+    Bring the rollup tables up to date with workout_log inside the caller's
+    write transaction.
+
+    Entries added since the high-water mark are aggregated by id range and
+    added to their days. Days marked stale by updates or deletes are
+    recomputed from the log. Weekly rows are then rebuilt from the daily
+    rows of every week touched.
+
+    :param full: Discard the rollups and aggregate the whole log again.
+    :return: True when the rollups changed.
+    """
+    if full:
+        for table, _ in ROLLUP_DIMENSIONS.values():
+            connection.execute(f"DELETE FROM {table}")
+        connection.execute("DELETE FROM workout_log_rollup_stale")
+        connection.execute("UPDATE workout_log_rollup_state SET last_id = 0")
+    last_id = connection.execute("SELECT last_id FROM workout_log_rollup_state").fetchone()[0]
+    max_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM workout_log").fetchone()[0]
+    stale = [row[0] for row in connection.execute("SELECT day FROM workout_log_rollup_stale")]
+    if max_id <= last_id and not stale:
+        return False
+
+    new_days = [
+        row[0] for row in connection.execute(
+            "SELECT DISTINCT date(created_at) FROM workout_log "
+            "WHERE id > ? AND id <= ? AND date(created_at) IS NOT NULL",
+            (last_id, max_id),
+        )
+    ]
+    stale_json = json.dumps(stale)
+    weeks = json.dumps(sorted({str(week_start(date.fromisoformat(day))) for day in stale + new_days}))
+    for table, key in ROLLUP_DIMENSIONS.values():
+        if stale:
+            connection.execute(
+                f"DELETE FROM {table} WHERE grain = 'day' AND period_start IN (SELECT value FROM json_each(?))",
+                (stale_json,),
+            )
+            _aggregate_days(
+                connection, table, key,
+                "date(w.created_at) IN (SELECT value FROM json_each(?)) AND w.id <= ?",
+                (stale_json, max_id), accumulate=False,
+            )
+        if max_id > last_id:
+            # Entries on stale days were just recomputed in full
+            _aggregate_days(
+                connection, table, key,
+                "w.id > ? AND w.id <= ? AND date(w.created_at) NOT IN (SELECT value FROM json_each(?))",
+                (last_id, max_id, stale_json), accumulate=True,
+            )
+        _rebuild_weeks(connection, table, key, weeks)
+
+    connection.execute("UPDATE workout_log_rollup_state SET last_id = ?", (max(max_id, last_id),))
+    connection.execute("DELETE FROM workout_log_rollup_stale")
+    logger.debug("Rolled up workout_log ids %d-%d and %d stale days", last_id + 1, max_id, len(stale))
+    return True
+
+
+# Keep the rollups current: the writer refreshes them in the same
+# transaction as every batch that writes workout_log
+register_write_hook("workout_log", _refresh)
+
+
+def refresh_rollups(full=False):
+    """
+    Refresh the rollups in one IMMEDIATE transaction, for the
+    refresh-log-rollups command and writes made outside the writer queue.
+    :param full: Discard the rollups and aggregate the whole log again,
+        e.g. after the catalog changed exercises' muscle groups.
+    :return: True when the rollups changed.
+    """
+    pool = get_current_pool()
+    connection = pool.acquire()
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        changed = _refresh(connection, full)
+        connection.execute("COMMIT")
+        return changed
+    except sqlite3.Error:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.isolation_level = isolation_level
+        pool.release(connection)
+
+
+def get_rollup_lag():
+    """
+    How far the rollups trail workout_log: entries not yet aggregated and
+    days waiting to be recomputed. Both are 0 when the rollups are current.
+    """
+    query = """
+        SELECT
+            (SELECT COUNT(*) FROM workout_log
+             WHERE id > (SELECT last_id FROM workout_log_rollup_state)) AS pending_entries,
+            (SELECT COUNT(*) FROM workout_log_rollup_stale) AS stale_days
+    """
+    with DatabaseHandler(read_only=True) as db:
+        return db.fetch_one(query)
+
+
+def get_rollups(by="exercise", grain="day", start=None, end=None, keys=None):
+    """
+    Pre-aggregated workout_log volume over a date range. A pure read; see
+    get_rollup_lag for how current the rollups are.
+    :param by: "exercise" or "muscle_group".
+    :param grain: "day" or "week".
+    :param start: First date (inclusive); a week grain includes the week containing it.
+    :param end: Last date (inclusive).
+    :param keys: Optional exercise names or muscle groups to limit the result to.
+    :return: Rows ordered by period then key, at most MAX_ROLLUP_ROWS.
+    :raises ValueError: For an unknown dimension or grain, or start after end.
+    """
+    if by not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension '{by}'. Use one of: {', '.join(ROLLUP_DIMENSIONS)}")
+    if grain not in ROLLUP_GRAINS:
+        raise ValueError(f"Unknown grain '{grain}'. Use one of: {', '.join(ROLLUP_GRAINS)}")
+    if start and end and start > end:
+        raise ValueError("start must not be after end")
+    if start and grain == "week":
+        start = week_start(start)
+
+    table, key = ROLLUP_DIMENSIONS[by]
+    conditions, params = ["grain = ?"], [grain]
+    if start:
+        conditions.append("period_start >= ?")
+        params.append(str(start))
+    if end:
+        conditions.append("period_start <= ?")
+        params.append(str(end))
+    if keys:
+        conditions.append(f"{key} IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(keys)))
+    query = f"""
+        SELECT period_start, {key}, entries,
+               ROUND(total_sets, 1) AS total_sets,
+               ROUND(total_reps, 1) AS total_reps,
+               ROUND(total_volume, 1) AS total_volume
+        FROM {table}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY period_start, {key}
+        LIMIT {MAX_ROLLUP_ROWS}
+    """
+    with DatabaseHandler(read_only=True) as db:
+        return db.fetch_all(query, params)
@@ -0,0 +1,105 @@
+import atexit
+import copy
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from utils.config import LOGS_DIR, LOG_LEVEL
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listeners = []
+
+
+# Argument types whose value cannot change while the record waits in the queue
+_IMMUTABLE_TYPES = frozenset({str, bytes, int, float, bool, type(None)})
+
+_traceback_formatter = logging.Formatter()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread
+    when that is safe.
+
+    The stock QueueHandler renders every message on the calling thread.
+    This queue never leaves the process, so records whose message and
+    arguments are immutable are enqueued as-is and their `%` formatting
+    happens on the background writer. Any other record is rendered here,
+    as the stock handler does, so a list or object changed after the call
+    is still logged as it was at the call.
+    """
+
+    def prepare(self, record):
+        if (
+            not record.exc_info
+            and type(record.msg) is str
+            and isinstance(record.args or (), tuple)
+            and all(type(arg) in _IMMUTABLE_TYPES for arg in record.args or ())
+        ):
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Render the traceback now rather than keep its frames alive in the queue
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def queued_logger(name, handlers, level=LOG_LEVEL):
+    """
+    Build a logger whose records are written by a background thread.
+    :param name: Logger name.
+    :param handlers: Handlers the background thread writes to.
+    :param level: Minimum level; calls below it return before any formatting.
+    :return: Configured logger.
+    """
+    logger = logging.getLogger(name)
+    if any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        return logger
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    logger.addHandler(DeferredQueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def _stop_listeners():
+    """Flush queued records on interpreter shutdown."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(_stop_listeners)
+
+
+def _build_app_logger():
+    """Root application logger: stdout plus a rotating file under LOGS_DIR."""
+    formatter = logging.Formatter(LOG_FORMAT)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    logfile = RotatingFileHandler(
+        os.path.join(LOGS_DIR, "app.log"), maxBytes=5 * 1024 * 1024, backupCount=5, delay=True
+    )
+    logfile.setFormatter(formatter)
+    return queued_logger("hypertrophy", [console, logfile])
+
+
+_app_logger = _build_app_logger()
+
+
+def get_logger(name):
+    """
+    Return a child of the application logger.
+    :param name: Usually the calling module's `__name__`.
+    """
+    return _app_logger.getChild(name)
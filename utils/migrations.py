@@ -0,0 +1,570 @@
+import sqlite3
+from utils.database import get_pool
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Columns the workout plan filters query (see FILTER_MAPPING in app.py)
+FILTER_COLUMNS = [
+    "primary_muscle_group",
+    "secondary_muscle_group",
+    "tertiary_muscle_group",
+    "advanced_isolated_muscles",
+    "force",
+    "equipment",
+    "mechanic",
+    "utility",
+    "grips",
+    "stabilizers",
+    "synergists",
+    "difficulty",
+]
+
+EXERCISE_COLUMNS = ["exercise_name"] + FILTER_COLUMNS
+
+
+def _create_exercises_table(table_name):
+    """CREATE statement for the exercises catalog with an integer primary key."""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        id INTEGER PRIMARY KEY,
+        exercise_name TEXT NOT NULL,
+        primary_muscle_group TEXT,
+        secondary_muscle_group TEXT,
+        tertiary_muscle_group TEXT,
+        advanced_isolated_muscles TEXT,
+        force TEXT,
+        equipment TEXT,
+        mechanic TEXT,
+        utility TEXT,
+        grips TEXT,
+        stabilizers TEXT,
+        synergists TEXT,
+        difficulty TEXT
+    );
+    """
+
+
+def _add_exercises_primary_key(connection):
+    """
+    Rebuild a legacy exercises table (no primary key, or exercise_name as key)
+    with an `id INTEGER PRIMARY KEY`, keeping existing rowids as ids.
+    """
+    columns = {row[1]: row[5] for row in connection.execute("PRAGMA table_info(exercises)")}
+    if columns.get("id"):
+        return
+    copied = ", ".join(column for column in EXERCISE_COLUMNS if column in columns)
+    connection.execute(_create_exercises_table("exercises_rebuild"))
+    connection.execute(
+        f"INSERT INTO exercises_rebuild (id, {copied}) SELECT rowid, {copied} FROM exercises"
+    )
+    connection.execute("DROP TABLE exercises")
+    connection.execute("ALTER TABLE exercises_rebuild RENAME TO exercises")
+
+
+# Exercises triggers skip their per-row work while a bulk load holds a row in
+# catalog_bulk_load; the loader syncs dependents set-wise instead (see catalog_import)
+BULK_LOAD_GUARD = "WHEN NOT EXISTS (SELECT 1 FROM catalog_bulk_load)"
+
+
+def _version_triggers(table_name, when=""):
+    """Triggers bumping data_versions for `table_name` on every insert, update and delete."""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table_name}_version_{event.lower()}
+        AFTER {event} ON {table_name} {when}
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE table_name = '{table_name}';
+        END;
+        """
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+# Catalog columns covered by full-text search, in exercises_fts column order
+SEARCH_COLUMNS = [
+    "exercise_name",
+    "primary_muscle_group",
+    "secondary_muscle_group",
+    "tertiary_muscle_group",
+    "advanced_isolated_muscles",
+    "stabilizers",
+    "synergists",
+    "equipment",
+]
+
+
+def _exercise_search_triggers(when=""):
+    """Triggers mirroring every exercises write into exercises_fts."""
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_insert AFTER INSERT ON exercises {when}
+        BEGIN
+            INSERT INTO exercises_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_delete AFTER DELETE ON exercises {when}
+        BEGIN
+            INSERT INTO exercises_fts (exercises_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_update AFTER UPDATE ON exercises {when}
+        BEGIN
+            INSERT INTO exercises_fts (exercises_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO exercises_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+def has_exercise_search(connection):
+    """True when the exercises_fts index exists (SQLite was built with FTS5)."""
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercises_fts'"
+    ).fetchone() is not None
+
+
+def _create_exercise_search(connection):
+    """
+    FTS5 index over the catalog, kept in sync by triggers on exercises.
+    Skipped with a warning when SQLite is built without FTS5; search then
+    falls back to LIKE matching.
+    """
+    try:
+        connection.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5(
+                {", ".join(SEARCH_COLUMNS)},
+                content='exercises', content_rowid='id', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("Full-text search unavailable, skipping exercises_fts: %s", e)
+        return
+    for statement in _exercise_search_triggers():
+        connection.execute(statement)
+    connection.execute("INSERT INTO exercises_fts (exercises_fts) VALUES ('rebuild')")
+
+
+def isolated_muscle_rows(alias, table=None):
+    """
+    SELECT producing one (exercise_id, exercise_name, isolated_muscle) row per
+    entry of the comma-separated advanced_isolated_muscles of `alias`, either
+    a trigger's new row or, when `table` is given, every row of that table.
+    Triggers cannot use recursive CTEs, so the list is split with json_each.
+    """
+    source = f"{table} AS {alias}, " if table else ""
+    return f"""
+        SELECT {alias}.id, {alias}.exercise_name, TRIM(muscles.value)
+        FROM {source}json_each('[' || REPLACE(json_quote({alias}.advanced_isolated_muscles), ',', '","') || ']') AS muscles
+        WHERE {alias}.advanced_isolated_muscles IS NOT NULL AND TRIM(muscles.value) <> ''
+    """
+
+
+def _isolated_muscle_triggers(when=""):
+    """Triggers keeping exercise_isolated_muscle in step with exercises writes."""
+    insert_new = f"INSERT OR IGNORE INTO exercise_isolated_muscle (exercise_id, exercise_name, isolated_muscle) {isolated_muscle_rows('new')};"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_isolated_muscle_insert AFTER INSERT ON exercises {when}
+        BEGIN
+            {insert_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_isolated_muscle_delete AFTER DELETE ON exercises {when}
+        BEGIN
+            DELETE FROM exercise_isolated_muscle WHERE exercise_id = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exercises_isolated_muscle_update
+        AFTER UPDATE OF id, exercise_name, advanced_isolated_muscles ON exercises {when}
+        BEGIN
+            DELETE FROM exercise_isolated_muscle WHERE exercise_id = old.id;
+            {insert_new}
+        END
+        """,
+    ]
+
+
+def _create_isolated_muscle_map(connection):
+    """
+    Normalized exercise -> isolated muscle mapping, kept in sync with the
+    catalog's advanced_isolated_muscles by triggers on exercises.
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS exercise_isolated_muscle (
+            exercise_id INTEGER NOT NULL,
+            exercise_name TEXT NOT NULL,
+            isolated_muscle TEXT NOT NULL,
+            PRIMARY KEY (exercise_id, isolated_muscle)
+        ) WITHOUT ROWID
+    """)
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_exercise_isolated_muscle_muscle "
+        "ON exercise_isolated_muscle(isolated_muscle)"
+    )
+    for statement in _isolated_muscle_triggers():
+        connection.execute(statement)
+    connection.execute("DELETE FROM exercise_isolated_muscle")
+    connection.execute(
+        f"INSERT OR IGNORE INTO exercise_isolated_muscle (exercise_id, exercise_name, isolated_muscle) "
+        f"{isolated_muscle_rows('e', 'exercises')}"
+    )
+
+
+def _guard_exercise_triggers(connection):
+    """
+    Recreate the per-row exercises triggers with BULK_LOAD_GUARD so bulk
+    catalog loads can sync dependents set-wise within their transaction.
+    """
+    connection.execute("CREATE TABLE IF NOT EXISTS catalog_bulk_load (started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    statements = _version_triggers("exercises", BULK_LOAD_GUARD) + _isolated_muscle_triggers(BULK_LOAD_GUARD)
+    if has_exercise_search(connection):
+        statements += _exercise_search_triggers(BULK_LOAD_GUARD)
+    triggers = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'exercises'"
+    ).fetchall()
+    for (name,) in triggers:
+        connection.execute(f"DROP TRIGGER {name}")
+    for statement in statements:
+        connection.execute(statement)
+
+
+def _weekly_summary_contributions(selection, exercise, source):
+    """
+    SELECT of one (method, muscle_group, sets, reps, weight) row per method and
+    muscle group role that user_selection rows contribute to weekly_summary.
+    :param selection: Alias of the user_selection row(s).
+    :param exercise: Alias of the matching exercises row(s).
+    :param source: FROM clause for whichever side is not a trigger's new/old row.
+    """
+    return f"""
+        SELECT f.method,
+               CASE f.role
+                   WHEN 'primary' THEN {exercise}.primary_muscle_group
+                   WHEN 'secondary' THEN {exercise}.secondary_muscle_group
+                   ELSE {exercise}.tertiary_muscle_group
+               END AS muscle_group,
+               {selection}.sets * f.factor AS total_sets,
+               {selection}.sets * {selection}.max_rep_range * f.factor AS total_reps,
+               {selection}.sets * {selection}.weight * f.factor AS total_weight
+        FROM {source}
+        CROSS JOIN weekly_summary_factors AS f
+        WHERE {exercise}.exercise_name = {selection}.exercise AND muscle_group <> ''
+    """
+
+
+def _apply_weekly_summary(contributions, sign):
+    """Upsert statement adding (sign=1) or removing (sign=-1) contributions."""
+    return f"""
+        INSERT INTO weekly_summary (method, muscle_group, total_sets, total_reps, total_weight, contributions)
+        SELECT method, muscle_group, {sign} * total_sets, {sign} * total_reps, {sign} * total_weight, {sign}
+        FROM ({contributions}) WHERE 1
+        ON CONFLICT (method, muscle_group) DO UPDATE SET
+            total_sets = total_sets + excluded.total_sets,
+            total_reps = total_reps + excluded.total_reps,
+            total_weight = total_weight + excluded.total_weight,
+            contributions = contributions + excluded.contributions;
+    """
+
+
+# Rows whose last contribution was removed
+_PRUNE_WEEKLY_SUMMARY = "DELETE FROM weekly_summary WHERE contributions <= 0;"
+
+# Full recomputation of weekly_summary from user_selection, used to backfill and after bulk loads
+REBUILD_WEEKLY_SUMMARY = [
+    "DELETE FROM weekly_summary",
+    f"""
+    INSERT INTO weekly_summary (method, muscle_group, total_sets, total_reps, total_weight, contributions)
+    SELECT method, muscle_group, SUM(total_sets), SUM(total_reps), SUM(total_weight), COUNT(*)
+    FROM ({_weekly_summary_contributions("us", "e", "user_selection AS us CROSS JOIN exercises AS e")})
+    GROUP BY method, muscle_group
+    """,
+]
+
+
+def _create_weekly_summary(connection):
+    """
+    Materialized weekly summary: one row per (method, muscle_group), kept
+    current by triggers on user_selection and on catalog rows it references.
+    """
+    connection.execute("DROP TABLE IF EXISTS weekly_summary")  # Never populated before this migration
+    connection.execute("""
+        CREATE TABLE weekly_summary (
+            method TEXT NOT NULL,
+            muscle_group TEXT NOT NULL,
+            total_sets REAL NOT NULL DEFAULT 0,
+            total_reps REAL NOT NULL DEFAULT 0,
+            total_weight REAL NOT NULL DEFAULT 0,
+            contributions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (method, muscle_group)
+        ) WITHOUT ROWID
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_summary_factors (
+            method TEXT NOT NULL,
+            role TEXT NOT NULL CHECK (role IN ('primary', 'secondary', 'tertiary')),
+            factor REAL NOT NULL,
+            PRIMARY KEY (method, role)
+        )
+    """)
+    connection.executemany(
+        "INSERT OR IGNORE INTO weekly_summary_factors (method, role, factor) VALUES (?, ?, ?)",
+        [
+            ("Total", "primary", 1), ("Total", "secondary", 1), ("Total", "tertiary", 0.33),
+            ("Fractional", "primary", 1), ("Fractional", "secondary", 0.5), ("Fractional", "tertiary", 0.17),
+            ("Direct", "primary", 1), ("Direct", "secondary", 0), ("Direct", "tertiary", 0),
+        ],
+    )
+
+    add_new = _apply_weekly_summary(_weekly_summary_contributions("new", "e", "exercises AS e"), 1)
+    remove_old = _apply_weekly_summary(_weekly_summary_contributions("old", "e", "exercises AS e"), -1)
+    triggers = [
+        ("trg_user_selection_weekly_summary_insert", "AFTER INSERT ON user_selection", add_new),
+        ("trg_user_selection_weekly_summary_delete", "AFTER DELETE ON user_selection", remove_old + _PRUNE_WEEKLY_SUMMARY),
+        ("trg_user_selection_weekly_summary_update",
+         "AFTER UPDATE OF exercise, sets, max_rep_range, weight ON user_selection",
+         remove_old + add_new + _PRUNE_WEEKLY_SUMMARY),
+    ]
+
+    # Catalog edits change which muscle groups a planned exercise counts toward
+    def for_catalog_row(alias):
+        return _weekly_summary_contributions("us", alias, "user_selection AS us")
+
+    triggers += [
+        ("trg_exercises_weekly_summary_insert", f"AFTER INSERT ON exercises {BULK_LOAD_GUARD}",
+         _apply_weekly_summary(for_catalog_row("new"), 1)),
+        ("trg_exercises_weekly_summary_delete", f"AFTER DELETE ON exercises {BULK_LOAD_GUARD}",
+         _apply_weekly_summary(for_catalog_row("old"), -1) + _PRUNE_WEEKLY_SUMMARY),
+        ("trg_exercises_weekly_summary_update",
+         "AFTER UPDATE OF exercise_name, primary_muscle_group, secondary_muscle_group, tertiary_muscle_group "
+         f"ON exercises {BULK_LOAD_GUARD}",
+         _apply_weekly_summary(for_catalog_row("old"), -1) + _apply_weekly_summary(for_catalog_row("new"), 1)
+         + _PRUNE_WEEKLY_SUMMARY),
+    ]
+    for name, event, body in triggers:
+        connection.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    for statement in REBUILD_WEEKLY_SUMMARY:
+        connection.execute(statement)
+
+
+# Per-user tables, shared by the single-database schema and tenant shards
+USER_SELECTION_TABLE = """
+    CREATE TABLE IF NOT EXISTS user_selection (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        routine TEXT NOT NULL,
+        exercise TEXT NOT NULL,
+        sets INTEGER NOT NULL,
+        min_rep_range INTEGER NOT NULL,
+        max_rep_range INTEGER NOT NULL,
+        rir INTEGER,
+        weight REAL NOT NULL,
+        UNIQUE (routine, exercise, sets, min_rep_range, max_rep_range, rir, weight)
+    );
+"""
+
+WORKOUT_LOG_TABLE = """
+    CREATE TABLE IF NOT EXISTS workout_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        workout_plan_id INTEGER,
+        routine TEXT NOT NULL,
+        exercise TEXT NOT NULL,
+        planned_sets INTEGER,
+        planned_min_reps INTEGER,
+        planned_max_reps INTEGER,
+        planned_rir INTEGER,
+        planned_weight REAL,
+        scored_weight REAL,
+        scored_min_reps INTEGER,
+        scored_max_reps INTEGER,
+        last_progression_date TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (workout_plan_id) REFERENCES user_selection(id)
+    );
+"""
+
+USER_TABLE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_user_selection_exercise ON user_selection(exercise)",
+    "CREATE INDEX IF NOT EXISTS idx_user_selection_routine_exercise ON user_selection(routine, exercise)",
+    "CREATE INDEX IF NOT EXISTS idx_workout_log_routine_exercise ON workout_log(routine, exercise)",
+    "CREATE INDEX IF NOT EXISTS idx_workout_log_workout_plan_id ON workout_log(workout_plan_id)",
+]
+
+DATA_VERSIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+
+# Daily and weekly workout_log rollups (see utils/log_rollups.py). Grains are
+# 'day' and 'week'; weeks start on Monday. The state row holds the highest
+# workout_log id already aggregated. Updates and deletes of aggregated rows
+# mark their days stale so the next refresh recomputes just those days.
+_ROLLUP_COLUMNS = """
+    entries INTEGER NOT NULL,
+    total_sets REAL NOT NULL,
+    total_reps REAL NOT NULL,
+    total_volume REAL NOT NULL,
+"""
+
+LOG_ROLLUP_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS workout_log_rollup_exercise (
+        grain TEXT NOT NULL,
+        period_start TEXT NOT NULL,
+        exercise TEXT NOT NULL,
+        {_ROLLUP_COLUMNS}
+        PRIMARY KEY (grain, exercise, period_start)
+    ) WITHOUT ROWID;
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS workout_log_rollup_muscle (
+        grain TEXT NOT NULL,
+        period_start TEXT NOT NULL,
+        muscle_group TEXT NOT NULL,
+        {_ROLLUP_COLUMNS}
+        PRIMARY KEY (grain, muscle_group, period_start)
+    ) WITHOUT ROWID;
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_workout_log_rollup_exercise_period ON workout_log_rollup_exercise(grain, period_start)",
+    "CREATE INDEX IF NOT EXISTS idx_workout_log_rollup_muscle_period ON workout_log_rollup_muscle(grain, period_start)",
+    """
+    CREATE TABLE IF NOT EXISTS workout_log_rollup_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_id INTEGER NOT NULL
+    );
+    """,
+    "INSERT OR IGNORE INTO workout_log_rollup_state (id, last_id) VALUES (1, 0)",
+    "CREATE TABLE IF NOT EXISTS workout_log_rollup_stale (day TEXT PRIMARY KEY) WITHOUT ROWID",
+    # Lets a refresh recompute stale days without scanning the whole log
+    "CREATE INDEX IF NOT EXISTS idx_workout_log_created_day ON workout_log(date(created_at))",
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_workout_log_rollup_update
+    AFTER UPDATE OF exercise, planned_sets, planned_max_reps, planned_weight,
+                    scored_max_reps, scored_weight, created_at ON workout_log
+    WHEN OLD.id <= (SELECT last_id FROM workout_log_rollup_state)
+    BEGIN
+        INSERT OR IGNORE INTO workout_log_rollup_stale (day) VALUES (date(OLD.created_at)), (date(NEW.created_at));
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_workout_log_rollup_delete
+    AFTER DELETE ON workout_log
+    WHEN OLD.id <= (SELECT last_id FROM workout_log_rollup_state)
+    BEGIN
+        INSERT OR IGNORE INTO workout_log_rollup_stale (day) VALUES (date(OLD.created_at));
+    END;
+    """,
+]
+
+
+# Ordered schema migrations. Each step is either a SQL statement or a
+# callable taking the connection. Append new migrations; never edit applied ones.
+MIGRATIONS = [
+    (1, "baseline schema", [
+        _create_exercises_table("exercises"),
+        USER_SELECTION_TABLE,
+        WORKOUT_LOG_TABLE,
+    ]),
+    (2, "exercises primary key", [
+        _add_exercises_primary_key,
+    ]),
+    (3, "access path indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_exercises_exercise_name ON exercises(exercise_name)",
+    ] + USER_TABLE_INDEXES + [
+        # NOCASE so the case-insensitive equality filters in ExerciseManager can use them
+        f"CREATE INDEX IF NOT EXISTS idx_exercises_{column} ON exercises({column} COLLATE NOCASE)"
+        for column in FILTER_COLUMNS
+    ]),
+    (4, "catalog version counter", [
+        DATA_VERSIONS_TABLE,
+        "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('exercises', 0)",
+    ] + _version_triggers("exercises")),
+    (5, "exercise full-text search", [
+        _create_exercise_search,
+    ]),
+    (6, "exercise isolated muscle map", [
+        _create_isolated_muscle_map,
+    ]),
+    (7, "plan and log version counters", [
+        "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('user_selection', 0)",
+        "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('workout_log', 0)",
+    ] + _version_triggers("user_selection") + _version_triggers("workout_log")),
+    (8, "bulk load guard on exercises triggers", [
+        _guard_exercise_triggers,
+    ]),
+    (9, "materialized weekly summary", [
+        _create_weekly_summary,
+    ]),
+    (10, "workout log rollups", LOG_ROLLUP_SCHEMA),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Schema of a user's shard in tenant mode: only the per-user tables and their
+# version counters. The catalog and everything derived from it (search index,
+# isolated muscle map) stay in DB_FILE, which shards attach read-only. Triggers
+# cannot reach attached databases, so shards have no materialized weekly
+# summary; tenant requests compute it with the summary engine instead.
+TENANT_MIGRATIONS = [
+    (1, "user shard baseline", [
+        USER_SELECTION_TABLE,
+        WORKOUT_LOG_TABLE,
+        DATA_VERSIONS_TABLE,
+        "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('user_selection', 0)",
+        "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('workout_log', 0)",
+    ] + USER_TABLE_INDEXES + _version_triggers("user_selection") + _version_triggers("workout_log")),
+    (2, "workout log rollups", LOG_ROLLUP_SCHEMA),
+]
+
+
+def get_schema_version(connection):
+    """Return the schema version recorded in PRAGMA user_version."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(migrations=MIGRATIONS, pool=None):
+    """
+    Apply every migration newer than PRAGMA user_version in one transaction.
+    :param migrations: Ordered list of (version, description, steps).
+    :param pool: Pool of the database to migrate; defaults to DB_FILE's.
+    :return: Schema version after migrating.
+    """
+    pool = pool or get_pool()
+    connection = pool.acquire()
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None  # Manage the transaction explicitly so DDL is included
+    try:
+        connection.execute("BEGIN IMMEDIATE")  # Serialize concurrent starters; re-read the version under the lock
+        current = get_schema_version(connection)
+        pending = [migration for migration in migrations if migration[0] > current]
+        for version, description, steps in pending:
+            logger.info("Applying migration %d: %s", version, description)
+            for step in steps:
+                if callable(step):
+                    step(connection)
+                else:
+                    connection.execute(step)
+        if pending:
+            connection.execute(f"PRAGMA user_version = {int(pending[-1][0])}")
+        connection.execute("COMMIT")
+        version = pending[-1][0] if pending else current
+        logger.info("Database schema at version %d", version)
+        return version
+    except sqlite3.Error as e:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        logger.error("Migration failed, schema left at version %d: %s", get_schema_version(connection), e)
+        raise
+    finally:
+        connection.isolation_level = isolation_level
+        pool.release(connection)
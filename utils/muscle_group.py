@@ -1,9 +1,13 @@
-from utils.database import DatabaseHandler
+from utils.catalog import get_catalog
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class MuscleGroupHandler:
     """
     Handles operations related to muscle groups in the exercises database.
+    Served from the in-memory exercise catalog snapshot.
     """
 
     def __init__(self):
@@ -14,14 +18,12 @@ class MuscleGroupHandler:
         Fetch all unique exercise names from the database.
         :return: List of unique exercise names.
         """
-        query = "SELECT DISTINCT exercise_name FROM exercises"
         try:
-            with DatabaseHandler() as db:
-                results = db.fetch_all(query)
-                print(f"DEBUG: Retrieved Exercises -> {results}")
-                return [row["exercise_name"] for row in results if "exercise_name" in row]
+            names = get_catalog().exercise_names()
+            logger.debug("Retrieved %d exercises", len(names))
+            return names
         except Exception as e:
-            print(f"Error fetching exercise names: {e}")
+            logger.error("Error fetching exercise names: %s", e)
             return []
 
     def get_muscle_groups(self, exercise_name):
@@ -30,22 +32,16 @@ class MuscleGroupHandler:
         :param exercise_name: Name of the exercise.
         :return: Tuple containing primary, secondary, and tertiary muscle groups.
         """
-        query = """
-            SELECT primary_muscle_group, secondary_muscle_group, tertiary_muscle_group 
-            FROM exercises 
-            WHERE exercise_name = ?
-        """
         try:
-            with DatabaseHandler() as db:
-                result = db.fetch_one(query, (exercise_name,))
-                print(f"DEBUG: Muscle groups for {exercise_name} -> {result}")
-                return (
-                    result["primary_muscle_group"],
-                    result["secondary_muscle_group"],
-                    result["tertiary_muscle_group"],
-                ) if result else (None, None, None)
+            result = get_catalog().get(exercise_name)
+            logger.debug("Muscle groups for %s -> %s", exercise_name, result)
+            return (
+                result["primary_muscle_group"],
+                result["secondary_muscle_group"],
+                result["tertiary_muscle_group"],
+            ) if result else (None, None, None)
         except Exception as e:
-            print(f"Error fetching muscle groups for exercise '{exercise_name}': {e}")
+            logger.error("Error fetching muscle groups for exercise '%s': %s", exercise_name, e)
             return None, None, None
 
     def fetch_muscle_groups_summary(self):
@@ -53,23 +49,15 @@ class MuscleGroupHandler:
         Fetch a summary of exercises grouped by their primary muscle group.
         :return: List of dictionaries containing muscle groups and exercise counts.
         """
-        query = """
-            SELECT primary_muscle_group, COUNT(*) AS exercise_count
-            FROM exercises
-            WHERE primary_muscle_group IS NOT NULL
-            GROUP BY primary_muscle_group
-            ORDER BY exercise_count DESC
-        """
         try:
-            with DatabaseHandler() as db:
-                results = db.fetch_all(query)
-                print(f"DEBUG: Muscle group summary -> {results}")
-                return [
-                    {"muscle_group": row["primary_muscle_group"], "exercise_count": row["exercise_count"]}
-                    for row in results
-                ]
+            results = get_catalog().muscle_group_counts()
+            logger.debug("Muscle group summary -> %s", results)
+            return [
+                {"muscle_group": muscle_group, "exercise_count": exercise_count}
+                for muscle_group, exercise_count in results
+            ]
         except Exception as e:
-            print(f"Error fetching muscle group summary: {e}")
+            logger.error("Error fetching muscle group summary: %s", e)
             return []
 
     def fetch_full_muscle_data(self, exercise_name):
@@ -78,20 +66,16 @@ class MuscleGroupHandler:
         :param exercise_name: Name of the exercise.
         :return: Dictionary containing muscle-related data.
         """
-        query = """
-            SELECT 
-                primary_muscle_group, secondary_muscle_group, tertiary_muscle_group, 
-                target_muscles, stabilizers, synergists
-            FROM exercises
-            WHERE exercise_name = ?
-        """
+        columns = (
+            "primary_muscle_group", "secondary_muscle_group", "tertiary_muscle_group",
+            "advanced_isolated_muscles", "stabilizers", "synergists",
+        )
         try:
-            with DatabaseHandler() as db:
-                result = db.fetch_one(query, (exercise_name,))
-                print(f"DEBUG: Full muscle data for {exercise_name} -> {result}")
-                return result if result else {}
+            result = get_catalog().get(exercise_name)
+            logger.debug("Full muscle data for %s -> %s", exercise_name, result)
+            return {column: result[column] for column in columns} if result else {}
         except Exception as e:
-            print(f"Error fetching full muscle data for exercise '{exercise_name}': {e}")
+            logger.error("Error fetching full muscle data for exercise '%s': %s", exercise_name, e)
             return {}
 
     MUSCLE_GROUPS = {
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.config import TENANT_SHARD_CACHE_SIZE
+from utils.database import DatabaseHandler
+from utils.data_versions import get_data_versions
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Days of history the trend slope is fitted over, counted back from each exercise's last entry
+TREND_WINDOW_DAYS = 90
+
+# Fewest entries inside the window for a trend to be reported
+TREND_MIN_POINTS = 3
+
+# An exercise is stalled when this many entries in a row brought no new e1RM best
+STALL_SESSIONS = 4
+
+# Julian day number of 1970-01-01, to turn SQLite julianday() values into dates
+_UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# One row per usable log entry, grouped by exercise and in time order. Scored
+# reps and weight win over planned ones; entries without both are skipped.
+_HISTORY_QUERY = """
+    SELECT exercise,
+           julianday(created_at) AS day,
+           COALESCE(planned_sets, 0) AS sets,
+           COALESCE(scored_max_reps, planned_max_reps) AS reps,
+           COALESCE(scored_weight, planned_weight) AS weight
+    FROM workout_log
+    WHERE julianday(created_at) IS NOT NULL
+      AND COALESCE(scored_max_reps, planned_max_reps) > 0
+      AND COALESCE(scored_weight, planned_weight) > 0
+    ORDER BY exercise, day, id
+"""
+
+
+def estimated_1rm(weight, reps):
+    """Epley estimated one-rep max; a single rep is taken at face value."""
+    return np.where(reps == 1, weight, weight * (1 + reps / 30))
+
+
+def _dates(julian_days):
+    """ISO dates for an array of julian day numbers."""
+    return np.floor(julian_days - _UNIX_EPOCH_JULIAN_DAY).astype("datetime64[D]").astype(str).tolist()
+
+
+def compute_progression(history):
+    """
+    Per-exercise progression metrics over the whole log in one vectorized pass.
+
+    Rows arrive sorted by exercise and time, so every exercise is a
+    contiguous segment. Running bests use a per-segment offset so a single
+    maximum.accumulate covers all exercises; trend sums use bincount.
+
+    :param history: Columns of _HISTORY_QUERY (see DatabaseHandler.fetch_columns).
+    :return: One dictionary per exercise, by exercise name: entries, first and
+        last date, best and latest e1RM, total and latest volume load, e1RM
+        trend per week (absolute and percent) and stall status.
+    """
+    names = np.array(history["exercise"], dtype=object)
+    if not len(names):
+        return []
+    day = np.array(history["day"], dtype=float)
+    sets = np.array(history["sets"], dtype=float)
+    reps = np.array(history["reps"], dtype=float)
+    weight = np.array(history["weight"], dtype=float)
+
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    ends = np.r_[starts[1:], len(names)] - 1
+    counts = ends - starts + 1
+    segment = np.repeat(np.arange(len(starts)), counts)
+    index = np.arange(len(names))
+
+    e1rm = estimated_1rm(weight, reps)
+    volume = sets * reps * weight
+
+    # Running best per exercise; the offset keeps earlier exercises from leaking into later ones
+    offset = segment * (e1rm.max() + 1)
+    running_best = np.maximum.accumulate(e1rm + offset) - offset
+    previous_best = np.r_[-np.inf, running_best[:-1]]
+    previous_best[starts] = -np.inf
+    last_record = np.maximum.accumulate(np.where(e1rm > previous_best, index, 0))
+    sessions_since_best = ends - last_record[ends]
+
+    # Least-squares e1RM slope over each exercise's trailing window
+    x = day - day[ends][segment]
+    in_window = (x >= -TREND_WINDOW_DAYS).astype(float)
+    groups = len(starts)
+    n = np.bincount(segment, in_window, groups)
+    sx = np.bincount(segment, x * in_window, groups)
+    sy = np.bincount(segment, e1rm * in_window, groups)
+    sxx = np.bincount(segment, x * x * in_window, groups)
+    sxy = np.bincount(segment, x * e1rm * in_window, groups)
+    denominator = n * sxx - sx * sx
+    fitted = (n >= TREND_MIN_POINTS) & (denominator > 1e-9)
+    slope = np.divide(n * sxy - sx * sy, denominator, out=np.zeros(groups), where=fitted) * 7
+    mean = np.divide(sy, n, out=np.zeros(groups), where=n > 0)
+    slope_pct = np.divide(slope * 100, mean, out=np.zeros(groups), where=fitted & (mean > 0))
+
+    total_volume = np.bincount(segment, volume, groups)
+    stalled = (counts > STALL_SESSIONS) & (sessions_since_best >= STALL_SESSIONS)
+    first_dates = _dates(day[starts])
+    last_dates = _dates(day[ends])
+
+    return [
+        {
+            "exercise": names[start],
+            "entries": int(counts[group]),
+            "first_date": first_dates[group],
+            "last_date": last_dates[group],
+            "best_e1rm": round(float(running_best[end]), 1),
+            "latest_e1rm": round(float(e1rm[end]), 1),
+            "total_volume": round(float(total_volume[group]), 1),
+            "latest_volume": round(float(volume[end]), 1),
+            "trend_per_week": round(float(slope[group]), 2) if fitted[group] else None,
+            "trend_pct_per_week": round(float(slope_pct[group]), 2) if fitted[group] else None,
+            "sessions_since_best": int(sessions_since_best[group]),
+            "stalled": bool(stalled[group]),
+        }
+        for group, (start, end) in enumerate(zip(starts, ends))
+    ]
+
+
+_cache = OrderedDict()  # User id (None outside tenant mode) -> (versions, progression)
+_cache_lock = threading.Lock()
+
+
+def get_progression():
+    """
+    Progression metrics for every logged exercise, recomputed only when
+    workout_log changed since the last call. The list is shared; do not modify it.
+    """
+    with DatabaseHandler(read_only=True) as db:
+        versions = get_data_versions(["workout_log"], db)
+        cached = _cache.get(db.tenant)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        with _cache_lock:
+            cached = _cache.get(db.tenant)
+            if cached is None or cached[0] != versions:
+                cached = (versions, compute_progression(db.fetch_columns(_HISTORY_QUERY)))
+                _cache[db.tenant] = cached
+                logger.debug("Recomputed progression for %d exercises", len(cached[1]))
+            _cache.move_to_end(db.tenant)
+            while len(_cache) > TENANT_SHARD_CACHE_SIZE:
+                _cache.popitem(last=False)
+            return cached[1]
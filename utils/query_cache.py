@@ -0,0 +1,288 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from utils.config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+_WHITESPACE = re.compile(r"\s+")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_WRITE_TARGET = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(?!SET\b)[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+_SCHEMA_CHANGE = re.compile(r"^\s*(?:CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_CACHEABLE = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+_TRIGGER_BODY = re.compile(r"\bBEGIN\b", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    """Collapse whitespace so formatting differences share one cache key."""
+    return _WHITESPACE.sub(" ", query).strip().rstrip(";").strip()
+
+
+def written_tables(query):
+    """Tables an INSERT, REPLACE, UPDATE or DELETE statement writes to directly."""
+    return {name.lower() for name in _WRITE_TARGET.findall(query)}
+
+
+class _Schema:
+    """
+    Table dependencies read from sqlite_master: which tables each table's
+    triggers write to, and which tables each view reads.
+    """
+
+    def __init__(self, connection):
+        rows = []
+        for database in connection.execute("PRAGMA database_list").fetchall():  # Includes an attached catalog
+            rows += connection.execute(f'SELECT type, name, tbl_name, sql FROM "{database[1]}".sqlite_master').fetchall()
+        self.tables = {row[1].lower() for row in rows if row[0] in ("table", "view")}
+        self.views = {
+            row[1].lower(): self._identifiers(row[3]) - {row[1].lower()}
+            for row in rows if row[0] == "view" and row[3]
+        }
+        self.trigger_writes = {}
+        for kind, _, table, sql in rows:
+            if kind == "trigger" and sql:
+                body = _TRIGGER_BODY.split(sql, maxsplit=1)[-1]  # Skip the "UPDATE OF ... ON" header
+                self.trigger_writes.setdefault(table.lower(), set()).update(written_tables(body))
+
+    def _identifiers(self, query):
+        return {token.lower() for token in _IDENTIFIER.findall(query)} & self.tables
+
+    def read_tables(self, query):
+        """Tables (and views' underlying tables) a query may read."""
+        tables = self._identifiers(query)
+        pending = [table for table in tables if table in self.views]
+        while pending:
+            for table in self.views[pending.pop()] - tables:
+                tables.add(table)
+                pending.append(table)
+        return tables
+
+    def affected_tables(self, tables):
+        """`tables` plus every table their triggers write to, transitively."""
+        affected = set(tables)
+        pending = list(affected)
+        while pending:
+            for table in self.trigger_writes.get(pending.pop(), frozenset()) - affected:
+                affected.add(table)
+                pending.append(table)
+        return affected
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of read results with a TTL, invalidated by table.
+
+    Every entry is tagged with the tables its query reads. A write
+    invalidates the tables it touches plus everything their triggers write
+    (e.g. user_selection -> weekly_summary, data_versions), so cached reads
+    never outlive a write made through this process. The TTL bounds how
+    stale an entry can get when another process writes the database.
+
+    A result is only stored if no invalidation happened since the read's
+    snapshot was taken (see `generation`); otherwise a read racing a write
+    could cache pre-write rows after the write's invalidation.
+
+    In tenant mode keys carry the user id as their scope: a user's writes
+    only invalidate that user's entries, while writes to the shared database
+    (scope None) invalidate matching entries of every user.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        """
+        :param max_size: Maximum cached results; 0 disables the cache.
+        :param ttl: Seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (expires, tables, rows)
+        self._by_table = {}
+        self._schema = None
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("hits", "misses", "stores", "stale_skips", "evictions", "expirations", "invalidations"), 0
+        )
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _get_schema(self, connection):
+        schema = self._schema
+        if schema is None:
+            schema = self._schema = _Schema(connection)
+        return schema
+
+    @staticmethod
+    def make_key(kind, query, params, scope=None):
+        """
+        Cache key for a read, or None when the params are not hashable.
+        :param kind: "all" or "one", so fetch_all and fetch_one never share entries.
+        :param scope: User id in tenant mode; None for the shared database.
+        """
+        if params is not None and not isinstance(params, tuple):
+            params = tuple(params) if isinstance(params, list) else (params,)
+        key = (scope, kind, normalize_sql(query), params or ())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        """
+        Cached rows for `key`, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._discard(key)
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[2]
+
+    def put(self, key, query, rows, generation, connection):
+        """
+        Store a read result.
+        :param key: Key from make_key.
+        :param query: SQL the rows came from; decides the entry's tables.
+        :param rows: Result to cache; callers must not modify it afterwards.
+        :param generation: Value of `generation` when the read's snapshot began.
+        :param connection: Connection used to load the schema on first use.
+        """
+        if not _CACHEABLE.match(query):
+            return
+        tables = self._get_schema(connection).read_tables(query)
+        if not tables:
+            return  # Nothing would ever invalidate it
+        with self._lock:
+            if generation != self.generation:
+                self._counters["stale_skips"] += 1
+                return
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tables, rows)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def _discard(self, key):
+        """Remove one entry and its table tags. Caller holds the lock."""
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate_tables(self, tables, connection=None, scope=None):
+        """
+        Drop every entry reading `tables` or a table their triggers write to.
+        :param tables: Names of tables that were written.
+        :param connection: Connection used to load the schema if not yet loaded;
+            without one (and no schema) the whole cache is cleared.
+        :param scope: User whose shard was written; None (the shared database)
+            invalidates every user's entries.
+        """
+        tables = {table.lower() for table in tables}
+        schema = self._schema
+        if schema is None and connection is not None:
+            schema = self._get_schema(connection)
+        with self._lock:
+            self.generation += 1
+            if schema is None:
+                self._clear()
+                return
+            removed = 0
+            for table in schema.affected_tables(tables):
+                for key in list(self._by_table.get(table, ())):
+                    if scope is None or key[0] == scope:
+                        self._discard(key)
+                        removed += 1
+            self._counters["invalidations"] += removed
+
+    def invalidate_statement(self, query, connection=None, scope=None):
+        """
+        Invalidate whatever a write statement may have changed. Schema changes
+        and statements whose target cannot be determined clear the cache.
+        :param scope: User whose shard the statement ran on, if any.
+        """
+        if _SCHEMA_CHANGE.match(query):
+            self.clear(reload_schema=True)
+            return
+        tables = written_tables(query)
+        if tables:
+            self.invalidate_tables(tables, connection, scope)
+        else:
+            self.clear()
+
+    def _clear(self):
+        self._counters["invalidations"] += len(self._entries)
+        self._entries.clear()
+        self._by_table.clear()
+
+    def clear(self, reload_schema=False):
+        """
+        Drop every entry.
+        :param reload_schema: Also forget the trigger/view dependencies (after DDL).
+        """
+        with self._lock:
+            self.generation += 1
+            self._clear()
+            if reload_schema:
+                self._schema = None
+
+    def stats(self, reset=False):
+        """
+        Hit/miss counters and current size.
+        :param reset: Zero the counters after reading them.
+        :return: Dictionary of counters, size, capacity, TTL and hit ratio.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            if reset:
+                self._counters = dict.fromkeys(self._counters, 0)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+        }
+
+
+query_cache = QueryCache()
+
+
+def invalidate_tables(*tables):
+    """
+    Invalidate cached reads after writing `tables` outside DatabaseHandler
+    (e.g. on a raw pooled connection).
+    """
+    if query_cache.enabled:
+        query_cache.invalidate_tables(tables)
+
+
+def dump_query_cache_stats(reset=False):
+    """
+    Return the query cache's counters.
+    :param reset: Zero the counters after reading them.
+    """
+    return query_cache.stats(reset=reset)
@@ -0,0 +1,162 @@
+import logging
+import os
+import re
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from utils.config import LOGS_DIR, SLOW_QUERY_MS, QUERY_STATS_SAMPLES
+from utils.logger import queued_logger
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """
+    Normalize a SQL statement so queries differing only in literals share one key.
+    :param query: SQL query text.
+    :return: Normalized query fingerprint.
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().rstrip(";").strip()
+    return normalized.lower()
+
+
+def _percentile(sorted_samples, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+class _FingerprintStats:
+    """Running totals and recent duration samples for one query fingerprint."""
+
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "samples")
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=max_samples)
+
+
+class QueryStats:
+    """
+    Thread-safe, in-process aggregate of query timings keyed by fingerprint.
+    """
+
+    def __init__(self, max_samples=QUERY_STATS_SAMPLES):
+        self.max_samples = max_samples
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, query_fingerprint, elapsed_ms, rows):
+        """
+        Record one statement execution.
+        :param query_fingerprint: Normalized query text.
+        :param elapsed_ms: Wall time in milliseconds.
+        :param rows: Rows returned or affected.
+        """
+        with self._lock:
+            stats = self._stats.get(query_fingerprint)
+            if stats is None:
+                stats = self._stats[query_fingerprint] = _FingerprintStats(self.max_samples)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += rows
+            stats.samples.append(elapsed_ms)
+
+    def snapshot(self):
+        """
+        Summarize every fingerprint, slowest total time first.
+        :return: List of dictionaries with count, total, p50, p95 and p99 timings.
+        """
+        with self._lock:
+            items = [
+                (key, stats.count, stats.total_ms, stats.max_ms, stats.rows, sorted(stats.samples))
+                for key, stats in self._stats.items()
+            ]
+        summary = [
+            {
+                "fingerprint": key,
+                "count": count,
+                "rows": rows,
+                "total_ms": round(total_ms, 3),
+                "mean_ms": round(total_ms / count, 3),
+                "p50_ms": round(_percentile(samples, 50), 3),
+                "p95_ms": round(_percentile(samples, 95), 3),
+                "p99_ms": round(_percentile(samples, 99), 3),
+                "max_ms": round(max_ms, 3),
+            }
+            for key, count, total_ms, max_ms, rows, samples in items
+        ]
+        summary.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return summary
+
+    def reset(self):
+        """Discard all recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+
+def _build_slow_query_logger():
+    """Create the logger that writes slow statements to a rotating file under LOGS_DIR."""
+    handler = RotatingFileHandler(
+        os.path.join(LOGS_DIR, "slow_queries.log"),
+        maxBytes=5 * 1024 * 1024,
+        backupCount=5,
+        delay=True,
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    return queued_logger("hypertrophy_slow_queries", [handler], level=logging.WARNING)
+
+
+query_stats = QueryStats()
+slow_query_logger = _build_slow_query_logger()
+slow_query_threshold_ms = SLOW_QUERY_MS
+
+
+def set_slow_query_threshold(milliseconds):
+    """
+    Change the slow-query threshold at runtime.
+    :param milliseconds: Statements taking at least this long are logged; None disables logging.
+    """
+    global slow_query_threshold_ms
+    slow_query_threshold_ms = milliseconds
+
+
+def record_query(query, params, elapsed_ms, rows):
+    """
+    Record a statement's timing and log it if it crossed the slow-query threshold.
+    :param query: SQL query text.
+    :param params: Parameters bound to the query.
+    :param elapsed_ms: Wall time in milliseconds.
+    :param rows: Rows returned or affected.
+    """
+    key = fingerprint(query)
+    query_stats.record(key, elapsed_ms, rows)
+    if slow_query_threshold_ms is not None and elapsed_ms >= slow_query_threshold_ms:
+        slow_query_logger.warning(
+            "%.3f ms | rows=%d | %s | params=%r", elapsed_ms, rows, key, params
+        )
+
+
+def dump_query_stats(reset=False):
+    """
+    Return the aggregated query statistics.
+    :param reset: Clear the aggregate after reading it.
+    :return: List of per-fingerprint summaries.
+    """
+    summary = query_stats.snapshot()
+    if reset:
+        query_stats.reset()
+    return summary
@@ -0,0 +1,143 @@
+import numpy as np
+from scipy import sparse
+from utils.database import DatabaseHandler
+from utils.filter_index import normalize
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Feature blocks and their weights. Before rows are normalized, each block an
+# exercise has contributes `weight` to the vector's L2 norm (a multi-value
+# block's weight is split over its values), so a fully shared block adds
+# weight ** 2 to the dot product of two exercises.
+FEATURE_WEIGHTS = {
+    "primary_muscle_group": 3.0,
+    "secondary_muscle_group": 1.5,
+    "tertiary_muscle_group": 0.75,
+    "advanced_isolated_muscles": 2.0,
+    "equipment": 1.0,
+    "mechanic": 1.0,
+    "force": 1.0,
+    "difficulty": 0.5,
+}
+
+# Columns holding comma-separated lists rather than single values
+MULTI_VALUE_COLUMNS = frozenset({"advanced_isolated_muscles"})
+
+# Query exercises scored against the catalog per matrix product (bounds the score matrix)
+SIMILARITY_BATCH_SIZE = 64
+
+# Upper bound on substitutes per exercise
+MAX_SUBSTITUTES = 50
+
+
+def _values(column, value):
+    """Normalized feature values of one cell."""
+    if not value:
+        return []
+    if column in MULTI_VALUE_COLUMNS:
+        return [normalize(part) for part in str(value).split(",") if part.strip()]
+    return [normalize(value)]
+
+
+class SimilarityIndex:
+    """
+    Exercise feature matrix for substitute lookups.
+
+    Every exercise becomes a weighted one-hot vector over its muscle groups,
+    isolated muscles, equipment, mechanic, force and difficulty. An
+    exercise has only a handful of the vocabulary's features, so rows are
+    kept in a sparse CSR matrix, L2-normalized once; cosine similarity for
+    any batch of exercises is a single sparse product against the whole
+    catalog.
+    """
+
+    def __init__(self, rows):
+        """
+        :param rows: Catalog rows, one per exercise name.
+        """
+        self.names = tuple(row["exercise_name"] for row in rows)
+        self._positions = {name: position for position, name in enumerate(self.names)}
+
+        vocabulary = {}
+        for row in rows:
+            for column in FEATURE_WEIGHTS:
+                for value in _values(column, row[column]):
+                    vocabulary.setdefault((column, value), len(vocabulary))
+
+        indptr, indices, data = [0], [], []
+        for row in rows:
+            features = {}
+            for column, weight in FEATURE_WEIGHTS.items():
+                values = _values(column, row[column])
+                for value in values:
+                    # Split a multi-value block's weight so long lists do not dominate
+                    features[vocabulary[(column, value)]] = weight / np.sqrt(len(values))
+            indices.extend(features)
+            data.extend(features.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_array(
+            (np.array(data), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(rows), len(vocabulary)),
+        )
+        norms = np.sqrt(matrix.multiply(matrix).sum(axis=1))
+        norms[norms == 0] = 1.0
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+        self.matrix = matrix
+        self._transposed = matrix.T.tocsr()
+
+        self.equipment = np.array([normalize(row["equipment"] or "") for row in rows])
+        self._equipment_labels = tuple(row["equipment"] for row in rows)
+
+    def _equipment_mask(self, equipment=None, exclude_equipment=None):
+        """Boolean mask of catalog rows allowed by the equipment constraints."""
+        mask = np.ones(len(self.names), dtype=bool)
+        if equipment:
+            mask &= np.isin(self.equipment, [normalize(value) for value in equipment])
+        if exclude_equipment:
+            mask &= ~np.isin(self.equipment, [normalize(value) for value in exclude_equipment])
+        return mask
+
+    def substitutes(self, exercise_names, k=5, equipment=None, exclude_equipment=None):
+        """
+        Top-k most similar exercises for each of `exercise_names`.
+        :param exercise_names: Exercises to find substitutes for; unknown names are skipped.
+        :param k: Substitutes per exercise.
+        :param equipment: Only suggest exercises using one of these equipment values.
+        :param exclude_equipment: Never suggest exercises using these equipment values.
+        :return: Mapping of exercise name to a list of (name, score, equipment), best first.
+        """
+        queries = [name for name in dict.fromkeys(exercise_names) if name in self._positions]
+        k = max(1, min(int(k), MAX_SUBSTITUTES, len(self.names)))
+        if not queries:
+            return {}
+        allowed = self._equipment_mask(equipment, exclude_equipment)
+
+        results = {}
+        for start in range(0, len(queries), SIMILARITY_BATCH_SIZE):
+            batch = queries[start:start + SIMILARITY_BATCH_SIZE]
+            positions = np.array([self._positions[name] for name in batch])
+            # Rounded so float noise cannot break ties, which go to catalog order below
+            scores = np.round((self.matrix[positions] @ self._transposed).toarray(), 6)
+            scores[:, ~allowed] = -np.inf
+            scores[np.arange(len(batch)), positions] = -np.inf  # Never suggest the exercise itself
+
+            # Best first; a stable sort keeps ties, also those at the cutoff, in catalog (name) order
+            top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+
+            for name, candidates, candidate_scores in zip(batch, top, top_scores):
+                results[name] = [
+                    (self.names[candidate], float(score), self._equipment_labels[candidate])
+                    for candidate, score in zip(candidates, candidate_scores)
+                    if np.isfinite(score)
+                ]
+        return results
+
+
+def get_routine_exercises(routine):
+    """Distinct exercises planned for a routine in user_selection."""
+    query = "SELECT DISTINCT exercise FROM user_selection WHERE routine = ? ORDER BY exercise"
+    with DatabaseHandler(read_only=True) as db:
+        return [row["exercise"] for row in db.fetch_all(query, (routine,))]
@@ -0,0 +1,224 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.config import TENANT_SHARD_CACHE_SIZE
+from utils.database import DatabaseHandler, get_pool
+from utils.data_versions import get_data_versions
+from utils.migrations import REBUILD_WEEKLY_SUMMARY
+from utils.query_cache import invalidate_tables
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Share of an exercise's volume credited to each muscle group role, per method.
+# The single source for every summary; weekly_summary_factors is synced from it.
+SCALING_FACTORS = {
+    "Total": {"primary": 1, "secondary": 1, "tertiary": 0.33},
+    "Fractional": {"primary": 1, "secondary": 0.5, "tertiary": 0.17},
+    "Direct": {"primary": 1, "secondary": 0, "tertiary": 0},
+}
+
+SUMMARY_METHODS = tuple(SCALING_FACTORS)
+
+
+def scaling_factors_key():
+    """The current scaling factors as a string, for cache keys of summary responses."""
+    return ";".join(
+        f"{method}.{role}={factor}" for method, roles in SCALING_FACTORS.items() for role, factor in roles.items()
+    )
+
+MUSCLE_GROUP_ROLES = ("primary", "secondary", "tertiary")
+
+# Tables the summaries are computed from; results are cached per their data versions
+SUMMARY_TABLES = ("user_selection", "exercises")
+
+_PLAN_QUERY = """
+    SELECT us.routine, us.sets, us.min_rep_range, us.max_rep_range, us.weight,
+           e.primary_muscle_group, e.secondary_muscle_group, e.tertiary_muscle_group
+    FROM user_selection us
+    JOIN exercises e ON us.exercise = e.exercise_name
+"""
+
+
+def _factor_matrix():
+    """Methods x roles array of scaling factors."""
+    return np.array(
+        [[SCALING_FACTORS[method][role] for role in MUSCLE_GROUP_ROLES] for method in SUMMARY_METHODS],
+        dtype=float,
+    )
+
+
+def _aggregate(keys, roles, rows, metrics, factors):
+    """
+    Sum every method's scaled metrics per key in one pass.
+    :param keys: Group index per (role, row) entry.
+    :param roles: Role index per entry.
+    :param rows: Plan row index per entry.
+    :param metrics: Rows x metrics array of unscaled values.
+    :param factors: Methods x roles scaling factors.
+    :return: Methods x groups x metrics totals.
+    """
+    methods = factors.shape[0]
+    group_count = int(keys.max()) + 1 if len(keys) else 0
+    weights = factors[:, roles]  # Methods x entries
+    slots = (np.arange(methods)[:, None] * group_count + keys[None, :]).ravel()
+    totals = np.empty((methods, group_count, metrics.shape[1]))
+    for metric in range(metrics.shape[1]):
+        scaled = (weights * metrics[rows, metric][None, :]).ravel()
+        totals[:, :, metric] = np.bincount(slots, weights=scaled, minlength=methods * group_count).reshape(
+            methods, group_count
+        )
+    return totals
+
+
+def compute_summaries(plan_rows):
+    """
+    Weekly and per-session summaries for every method from one pass over the plan.
+
+    Each planned set counts toward the exercise's primary, secondary and
+    tertiary muscle groups, scaled by SCALING_FACTORS. Weekly totals use
+    max reps; session totals use the middle of the rep range, as before.
+
+    :param plan_rows: Joined user_selection x exercises rows (see _PLAN_QUERY).
+    :return: {method: {"weekly": [...], "session": [...]}}.
+    """
+    summaries = {method: {"weekly": [], "session": []} for method in SUMMARY_METHODS}
+    if not plan_rows:
+        return summaries
+
+    sets = np.array([row["sets"] for row in plan_rows], dtype=float)
+    min_reps = np.array([row["min_rep_range"] for row in plan_rows], dtype=float)
+    max_reps = np.array([row["max_rep_range"] for row in plan_rows], dtype=float)
+    weight = np.array([row["weight"] or 0 for row in plan_rows], dtype=float)
+    mid_reps = sets * (min_reps + max_reps) / 2
+    weekly_metrics = np.column_stack([sets, sets * max_reps, sets * weight])
+    session_metrics = np.column_stack([sets, mid_reps, mid_reps * weight])
+
+    # One entry per (role, row) with a muscle group; blank groups are skipped
+    weekly_groups, session_groups = {}, {}
+    weekly_keys, session_keys, roles, rows = [], [], [], []
+    for index, row in enumerate(plan_rows):
+        for role_index, role in enumerate(MUSCLE_GROUP_ROLES):
+            muscle_group = row[f"{role}_muscle_group"]
+            if not muscle_group:
+                continue
+            weekly_keys.append(weekly_groups.setdefault(muscle_group, len(weekly_groups)))
+            session_keys.append(session_groups.setdefault((row["routine"], muscle_group), len(session_groups)))
+            roles.append(role_index)
+            rows.append(index)
+    roles = np.array(roles, dtype=np.intp)
+    rows = np.array(rows, dtype=np.intp)
+
+    factors = _factor_matrix()
+    weekly = _aggregate(np.array(weekly_keys, dtype=np.intp), roles, rows, weekly_metrics, factors)
+    session = _aggregate(np.array(session_keys, dtype=np.intp), roles, rows, session_metrics, factors)
+    weekly = np.round(weekly, 1)
+    session = np.round(session, 1)
+
+    weekly_order = sorted(weekly_groups.items())
+    session_order = sorted(session_groups.items())
+    for method_index, method in enumerate(SUMMARY_METHODS):
+        summaries[method]["weekly"] = [
+            {
+                "muscle_group": muscle_group,
+                "total_sets": float(weekly[method_index, key, 0]),
+                "total_reps": float(weekly[method_index, key, 1]),
+                "total_weight": float(weekly[method_index, key, 2]),
+            }
+            for muscle_group, key in weekly_order
+        ]
+        summaries[method]["session"] = [
+            {
+                "routine": routine,
+                "muscle_group": muscle_group,
+                "total_sets": float(session[method_index, key, 0]),
+                "total_reps": float(session[method_index, key, 1]),
+                "total_volume": float(session[method_index, key, 2]),
+            }
+            for (routine, muscle_group), key in session_order
+        ]
+    return summaries
+
+
+_cache = OrderedDict()  # User id (None outside tenant mode) -> (versions, summaries)
+_cache_lock = threading.Lock()
+
+
+def get_summaries():
+    """
+    All methods' summaries for the current plan, recomputed only when
+    user_selection or exercises changed since the last call. In tenant mode
+    the most recently used users' summaries are kept.
+    """
+    with DatabaseHandler(read_only=True) as db:
+        versions = get_data_versions(SUMMARY_TABLES, db)
+        cached = _cache.get(db.tenant)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        with _cache_lock:
+            cached = _cache.get(db.tenant)
+            if cached is None or cached[0] != versions:
+                cached = (versions, compute_summaries(db.fetch_all(_PLAN_QUERY)))
+                _cache[db.tenant] = cached
+                logger.debug("Recomputed plan summaries at versions %s", versions)
+            _cache.move_to_end(db.tenant)
+            while len(_cache) > TENANT_SHARD_CACHE_SIZE:
+                _cache.popitem(last=False)
+            return cached[1]
+
+
+def get_summary(method, kind):
+    """
+    One method's summary.
+    :param method: "Total", "Fractional" or "Direct"; unknown methods fall back to Total.
+    :param kind: "weekly" or "session".
+    """
+    if method not in SCALING_FACTORS:
+        logger.warning("Unsupported method '%s'. Defaulting to 'Total'.", method)
+        method = "Total"
+    return [dict(row) for row in get_summaries()[method][kind]]  # Callers may modify their copy
+
+
+def sync_scaling_factors():
+    """
+    Make weekly_summary_factors match SCALING_FACTORS, rebuilding the
+    materialized weekly_summary when any factor changed.
+    :return: True when the factors were updated.
+    """
+    wanted = {
+        (method, role): float(factor)
+        for method, roles in SCALING_FACTORS.items()
+        for role, factor in roles.items()
+    }
+    pool = get_pool()
+    connection = pool.acquire()
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        current = {
+            (row["method"], row["role"]): row["factor"]
+            for row in connection.execute("SELECT method, role, factor FROM weekly_summary_factors")
+        }
+        if current == wanted:
+            connection.execute("COMMIT")
+            return False
+        connection.execute("DELETE FROM weekly_summary_factors")
+        connection.executemany(
+            "INSERT INTO weekly_summary_factors (method, role, factor) VALUES (?, ?, ?)",
+            [(method, role, factor) for (method, role), factor in wanted.items()],
+        )
+        for statement in REBUILD_WEEKLY_SUMMARY:
+            connection.execute(statement)
+        connection.execute("COMMIT")
+        invalidate_tables("weekly_summary_factors", "weekly_summary")
+        logger.info("Scaling factors changed; rebuilt weekly_summary")
+        return True
+    except Exception:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.isolation_level = isolation_level
+        pool.release(connection)
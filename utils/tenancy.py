@@ -0,0 +1,105 @@
+import contextlib
+import contextvars
+import hashlib
+import os
+import re
+from pathlib import Path
+from flask import g, has_request_context, jsonify, request
+from utils.config import DB_FILE, TENANT_MODE, TENANT_HEADER, TENANT_DIR
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Accepted user ids: safe as file names on every platform
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Tables stored in each user's shard; everything else is read from the shared catalog
+SHARD_TABLES = ("user_selection", "workout_log")
+
+# Schema name the shared catalog is attached under on shard connections
+CATALOG_SCHEMA = "catalog"
+
+_scoped_tenant = contextvars.ContextVar("tenant", default=None)
+
+
+def validate_tenant_id(tenant_id):
+    """
+    Check a user id before it is used in a shard path.
+    :raises ValueError: For empty or unsafe ids.
+    """
+    if not isinstance(tenant_id, str) or not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError("Invalid user id")
+    return tenant_id
+
+
+def current_tenant():
+    """
+    The user whose shard database calls should use, or None for the shared database.
+    An explicit tenant_scope wins over the request's user; outside tenant mode
+    this is always None.
+    """
+    if not TENANT_MODE:
+        return None
+    tenant_id = _scoped_tenant.get()
+    if tenant_id is None and has_request_context():
+        tenant_id = g.get("tenant_id")
+    return tenant_id
+
+
+@contextlib.contextmanager
+def tenant_scope(tenant_id):
+    """
+    Route database calls in this context to `tenant_id`'s shard, e.g. in
+    worker threads, scripts or CLI commands. None selects the shared database.
+    """
+    if tenant_id is not None:
+        validate_tenant_id(tenant_id)
+    token = _scoped_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _scoped_tenant.reset(token)
+
+
+def shard_path(tenant_id):
+    """
+    Shard file for a user. Files are fanned out over 256 folders by a hash
+    of the id so no single directory grows to thousands of entries.
+    """
+    validate_tenant_id(tenant_id)
+    bucket = hashlib.blake2b(tenant_id.encode(), digest_size=1).hexdigest()
+    return os.path.join(TENANT_DIR, bucket, f"{tenant_id}.db")
+
+
+def attach_catalog(connection):
+    """
+    Attach the shared catalog (DB_FILE) read-only to a shard connection.
+    Unqualified names such as `exercises` then resolve to the catalog because
+    shards do not define them. The connection must be opened with uri=True.
+    """
+    uri = f"{Path(DB_FILE).resolve().as_uri()}?mode=ro"
+    connection.execute(f"ATTACH DATABASE ? AS {CATALOG_SCHEMA}", (uri,))
+
+
+def _identify_tenant():
+    """Resolve the request's user from TENANT_HEADER (registered as before_request handler)."""
+    if request.endpoint == "static":
+        return None
+    tenant_id = request.headers.get(TENANT_HEADER, "").strip()
+    try:
+        g.tenant_id = validate_tenant_id(tenant_id)
+    except ValueError:
+        logger.warning("Rejected request without a valid %s header: %s", TENANT_HEADER, request.path)
+        return jsonify({"error": f"A valid {TENANT_HEADER} header is required"}), 400
+    return None
+
+
+def init_app(app):
+    """
+    Register per-request user identification on a Flask app. Does nothing
+    unless TENANT_MODE is enabled.
+    """
+    if TENANT_MODE:
+        app.before_request(_identify_tenant)
+        logger.info("Tenant mode enabled; users identified by the %s header", TENANT_HEADER)
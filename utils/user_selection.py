@@ -1,5 +1,8 @@
 import sqlite3
-from utils.config import DB_FILE
+from utils.database import DatabaseHandler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def get_user_selection():
@@ -30,13 +33,11 @@ def get_user_selection():
     JOIN exercises e ON us.exercise = e.exercise_name;
     """
     try:
-        with sqlite3.connect(DB_FILE) as connection:
-            cursor = connection.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
+        with DatabaseHandler(read_only=True) as db:
+            results = db.fetch_all(query)
 
         if not results:
-            print("DEBUG: No user selection data found.")  # Debugging log
+            logger.debug("No user selection data found.")
 
         # Format results into a list of dictionaries for easier handling
         user_selection = [
@@ -52,7 +53,7 @@ def get_user_selection():
                 "primary_muscle_group": row["primary_muscle_group"],
                 "secondary_muscle_group": row["secondary_muscle_group"],
                 "tertiary_muscle_group": row["tertiary_muscle_group"],
-                "target_muscles": row["target_muscles"],
+                "advanced_isolated_muscles": row["advanced_isolated_muscles"],
                 "utility": row["utility"],
                 "grips": row["grips"],
                 "stabilizers": row["stabilizers"],
@@ -60,15 +61,15 @@ def get_user_selection():
             }
             for row in results
         ]
-        print("DEBUG: User selection data retrieved successfully.")  # Debugging log
+        logger.debug("User selection data retrieved successfully.")
         return user_selection
 
     except sqlite3.OperationalError as oe:
-        print(f"Operational error in database: {oe}")
+        logger.error("Operational error in database: %s", oe)
         return []
     except sqlite3.Error as e:
-        print(f"Database error: {e}")
+        logger.error("Database error: %s", e)
         return []
     except Exception as ex:
-        print(f"Unexpected error: {ex}")
+        logger.error("Unexpected error: %s", ex)
         return []
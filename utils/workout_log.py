@@ -1,4 +1,7 @@
 from .database import DatabaseHandler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def get_workout_logs():
     """Fetch all workout log entries."""
@@ -7,8 +10,8 @@ def get_workout_logs():
     ORDER BY routine, exercise
     """
     try:
-        with DatabaseHandler() as db:
-            return db.fetch_all(query)
+        with DatabaseHandler(read_only=True) as db:
+            return db.fetch_all(query, cache=True)
     except Exception as e:
-        print(f"Error fetching workout logs: {e}")
+        logger.error("Error fetching workout logs: %s", e)
         return [] 
\ No newline at end of file